@@ -1,11 +1,21 @@
-from pydantic import BaseModel
-from sqlalchemy import delete, insert, select, update
-from sqlalchemy.exc import NoResultFound, IntegrityError, ProgrammingError
+from functools import lru_cache
+from typing import AsyncIterator, Sequence
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Select, Text, cast, delete, func, insert, select, update
+from sqlalchemy.exc import DBAPIError, NoResultFound, IntegrityError, ProgrammingError
 
 from src.exceptions import InvalidInputException, ObjectNotFoundException
 from src.logger import logger
 
 
+# Функция для получения адаптера, который валидирует список моделей одним вызовом.
+# Адаптер создается один раз для каждой схемы
+@lru_cache
+def list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
 class BaseCRUD:
     model = None
     schema: BaseModel = None
@@ -13,13 +23,25 @@ class BaseCRUD:
     def __init__(self, session):
         self.session = session
 
+    # Метод для приведения строк результата (ORM объектов или Row с нужными столбцами)
+    # к списку pydantic моделей за один проход вместо model_validate для каждой строки
+    def _to_schemas(self, rows: Sequence, schema: type[BaseModel] | None = None) -> list[BaseModel]:
+        return list_adapter(schema or self.schema).validate_python(rows, from_attributes=True)
+
+    # Метод для получения столбцов таблицы, соответствующих полям схемы.
+    # Запрос только этих столбцов не читает из базы лишние данные.
+    # Поля схемы, которых нет среди столбцов таблицы (например, связи), пропускаются
+    def _columns(self, schema: type[BaseModel]) -> list:
+        columns = self.model.__table__.columns
+        return [getattr(self.model, name) for name in schema.model_fields if name in columns]
+
     # Метод для добавления данных в базу
     async def create(self, data: BaseModel) -> BaseModel:
-        logger.info("Добавление данных в базу")
+        logger.debug("Добавление данных в базу")
         stmt = insert(self.model).values(**data.model_dump()).returning(self.model)
         try:
             result = await self.session.execute(stmt)
-            logger.info("Данные добавлены успешно")
+            logger.debug("Данные добавлены успешно")
         except IntegrityError:
             logger.error("Ошибка добавления данных в базу")
             raise InvalidInputException
@@ -27,60 +49,134 @@ class BaseCRUD:
         model = self.schema.model_validate(result.scalars().one(), from_attributes=True)
         return model
     
-    # Метод для добавления сразу нескольких строк данных в базу
+    # Метод для добавления сразу нескольких строк данных в базу.
+    # Строки вставляются многострочными INSERT ... RETURNING, добавленные модели
+    # возвращаются в том же порядке, в котором были переданы
     async def add_many(self, data: list[BaseModel]) -> list[BaseModel]:
-        logger.info("Добавление нескольких строк данных в базу")
-        stmt = insert(self.model).values([item.model_dump() for item in data])
+        logger.debug("Добавление нескольких строк данных в базу")
+        if not data:
+            return []
+        stmt = insert(self.model).returning(self.model, sort_by_parameter_order=True)
         try:
-            await self.session.execute(stmt)
-            logger.info("Данные добавлены успешно")
-        except IntegrityError:
+            result = await self.session.execute(stmt, [item.model_dump() for item in data])
+            logger.debug("Данные добавлены успешно")
+        except DBAPIError as e:
+            # Ошибки соединения пробрасываются дальше, остальные (нарушение ограничений,
+            # слишком длинные строки и т.п.) считаются ошибками входных данных
+            if e.connection_invalidated:
+                raise
             logger.error("Ошибка добавления данных")
             raise InvalidInputException
+        return self._to_schemas(result.scalars().all())
+
+    # Метод для получения множества id из переданных, которые есть в таблице
+    async def get_existing_ids(self, ids: set[int]) -> set[int]:
+        logger.debug("Проверка существования данных по ID")
+        if not ids:
+            return set()
+        query = select(self.model.id).filter(self.model.id.in_(ids))
+        result = await self.session.execute(query)
+        return set(result.scalars().all())
 
-    # Метод для получения всех данных из таблицы
-    async def get_all(self) -> list[BaseModel]:
-        logger.info("Получение всех данных из таблицы")
+    # Метод для применения пагинации к запросу. Сортировка по id нужна,
+    # чтобы страницы были стабильными между запросами. Если передан after_id,
+    # используется пагинация по курсору (WHERE id > after_id) вместо OFFSET,
+    # и стоимость запроса не зависит от глубины страницы.
+    # Для запросов с группировкой можно передать другой столбец id (id_column).
+    # При descending=True записи идут по убыванию id, и курсор выбирает id < after_id
+    def _paginate(
+        self,
+        query: Select,
+        limit: int | None,
+        offset: int | None = None,
+        after_id: int | None = None,
+        id_column=None,
+        descending: bool = False,
+    ) -> Select:
+        id_column = self.model.id if id_column is None else id_column
+        query = query.order_by(id_column.desc() if descending else id_column).limit(limit)
+        if after_id is not None:
+            return query.filter(id_column < after_id if descending else id_column > after_id)
+        return query.offset(offset)
+
+    # Метод для получения всех данных из таблицы (или одной страницы, если передан limit).
+    # Если передана схема, из таблицы читаются только ее поля, и результат приводится к ней
+    async def get_all(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+        schema: type[BaseModel] | None = None,
+    ) -> list[BaseModel]:
+        logger.debug("Получение всех данных из таблицы")
         try:
-            query = select(self.model)
+            query = select(*self._columns(schema)) if schema else select(self.model)
+            query = self._paginate(query, limit=limit, offset=offset, after_id=after_id)
             result = await self.session.execute(query)
-            models = [
-                self.schema.model_validate(one, from_attributes=True)
-                for one in result.scalars().all()
-            ]
-            logger.info("Данные получены успешно")
+            rows = result.all() if schema else result.scalars().all()
+            models = self._to_schemas(rows, schema)
+            logger.debug("Данные получены успешно")
             return models
         except NoResultFound:
             logger.error("Ошибка получения данных из таблицы")
             raise ObjectNotFoundException
 
-    # Метод для получения данных по ID
-    async def get_by_id(self, id: int) -> BaseModel:
-        logger.info("Получение данных по ID")
+    # Метод для потокового чтения всей таблицы. Строки читаются серверным курсором
+    # частями по batch_size, поэтому память не зависит от размера таблицы
+    async def stream_all(self, batch_size: int = 1000) -> AsyncIterator[BaseModel]:
+        logger.debug("Потоковое получение всех данных из таблицы")
+        query = select(self.model).order_by(self.model.id).execution_options(yield_per=batch_size)
+        result = await self.session.stream_scalars(query)
+        async for one in result:
+            yield self.schema.model_validate(one, from_attributes=True)
+
+    # Метод для подсчета количества строк в таблице, подходящих под фильтр
+    async def count(self, **filter_by) -> int:
+        logger.debug("Подсчет количества строк в таблице")
+        query = select(func.count()).select_from(self.model).filter_by(**filter_by)
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    # Метод для получения данных по ID. Если передана схема, читаются только ее поля
+    async def get_by_id(self, id: int, schema: type[BaseModel] | None = None) -> BaseModel:
+        logger.debug("Получение данных по ID")
         try:
-            query = select(self.model).filter(self.model.id == id)
-            result = await self.session.execute(query)
-            model = self.schema.model_validate(result.scalars().one(), from_attributes=True)
-            logger.info("Данные получены успешно")
+            if schema:
+                query = select(*self._columns(schema)).filter(self.model.id == id)
+                result = await self.session.execute(query)
+                model = schema.model_validate(result.one(), from_attributes=True)
+            else:
+                query = select(self.model).filter(self.model.id == id)
+                result = await self.session.execute(query)
+                model = self.schema.model_validate(result.scalars().one(), from_attributes=True)
+            logger.debug("Данные получены успешно")
             return model
         except NoResultFound:
             logger.error("Ошибка получения данных по ID")
             raise ObjectNotFoundException
 
+    # Метод для получения хеша всей строки по ID, вычисленного в базе (md5 текстового
+    # представления строки). Хеш меняется при любом изменении строки, поэтому подходит
+    # для ETag без чтения и сериализации данных. Возвращает None, если строки нет
+    async def get_row_hash(self, id: int) -> str | None:
+        logger.debug("Получение хеша строки по ID")
+        row = cast(self.model.__table__.table_valued(), Text)
+        query = select(func.md5(row)).filter(self.model.id == id)
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
     # Метод для получения данных по фильтру
     async def get_filtered(self, **filter_by) -> list[BaseModel]:
-        logger.info("Получение данных по фильтру")
+        logger.debug("Получение данных по фильтру")
         query = select(self.model).filter_by(**filter_by)
         result = await self.session.execute(query)
-        models = [
-            self.schema.model_validate(one, from_attributes=True) for one in result.scalars().all()
-        ]
-        logger.info("Данные получены успешно")
+        models = self._to_schemas(result.scalars().all())
+        logger.debug("Данные получены успешно")
         return models
 
     # Метод для изменения данных, которые передали
     async def update(self, data: BaseModel, **filter_by) -> BaseModel:
-        logger.info("Изменение данных")
+        logger.debug("Изменение данных")
         stmt = (
             update(self.model)
             .filter_by(**filter_by)
@@ -89,7 +185,7 @@ class BaseCRUD:
         )
         try:
             result = await self.session.execute(stmt)
-            logger.info("Данные изменены успешно")
+            logger.debug("Данные изменены успешно")
         except (IntegrityError, ProgrammingError):
             logger.error("Ошибка изменения данных")
             raise InvalidInputException
@@ -104,12 +200,12 @@ class BaseCRUD:
 
     # Метод для удаления данных по заданным фильтрам
     async def delete(self, **filter_by) -> BaseModel:
-        logger.info("Удаление данных")
+        logger.debug("Удаление данных")
         stmt = delete(self.model).filter_by(**filter_by).returning(self.model)
         result = await self.session.execute(stmt)
         try:
             model = self.schema.model_validate(result.scalars().one(), from_attributes=True)
-            logger.info("Данные удалены успешно")
+            logger.debug("Данные удалены успешно")
         except NoResultFound:
             logger.error("Ошибка удаления данных")
             raise ObjectNotFoundException
@@ -1,10 +1,23 @@
-from sqlalchemy import delete, insert, select
-from sqlalchemy.orm import selectinload
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+from sqlalchemy import Integer, any_, bindparam, cast, delete, exists, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG, insert as pg_insert
+from sqlalchemy.orm import load_only, selectinload
 from sqlalchemy.exc import IntegrityError
 
 from src.exceptions import InvalidInputException, ObjectNotFoundException
-from src.schemas.book import Book, BookWithRels, BooksAuthors, BooksAuthorsAdd
-from src.models.book import BooksAuthorsORM, BooksORM
+from src.schemas.author import Author
+from src.schemas.book import (
+    Book,
+    BookAvailability,
+    BookSearchParams,
+    BookWithRels,
+    BooksAuthors,
+    BooksAuthorsAdd,
+)
+from src.models.author import AuthorsORM
+from src.models.book import SEARCH_CONFIG, BooksAuthorsORM, BooksORM
 from src.CRUD.base import BaseCRUD
 from src.logger import logger
 
@@ -13,46 +26,178 @@ class BookCRUD(BaseCRUD):
     model = BooksORM
     schema = Book
 
-    async def get_book_with_rels(self, **filter_by) -> list[Book]:
-        logger.info("Получение книг")
-        query = select(self.model).options(selectinload(self.model.authors)).filter_by(**filter_by)
+    # Метод для получения книг с авторами. Из таблиц книг и авторов читаются
+    # только поля переданных схем (например, для краткого списка без описаний)
+    async def get_book_with_rels(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+        schema: type[BaseModel] = BookWithRels,
+        author_schema: type[BaseModel] = Author,
+        **filter_by,
+    ) -> list[BaseModel]:
+        logger.debug("Получение книг")
+        author_columns = [getattr(AuthorsORM, name) for name in author_schema.model_fields]
+        query = (
+            select(self.model)
+            .options(
+                load_only(*self._columns(schema)),
+                selectinload(self.model.authors).load_only(*author_columns),
+            )
+            .filter_by(**filter_by)
+        )
+        query = self._paginate(query, limit=limit, offset=offset, after_id=after_id)
         result = await self.session.execute(query)
-        models = [
-            BookWithRels.model_validate(one, from_attributes=True) for one in result.scalars().all()
-        ]
+        models = self._to_schemas(result.scalars().all(), schema)
         if not models:
             logger.error("Книги не найдены")
             raise ObjectNotFoundException
-        logger.info("Книги получены успешно")
+        logger.debug("Книги получены успешно")
         return models
 
+    # Метод для получения количества доступных копий сразу нескольких книг одним запросом.
+    # id передаются одним параметром-массивом (id = ANY(:ids)), поэтому текст запроса
+    # не зависит от количества id. Несуществующие id в результат не попадают
+    async def get_availability(self, ids: list[int]) -> list[BookAvailability]:
+        logger.debug("Получение количества доступных копий книг")
+        query = (
+            select(self.model.id, self.model.available_copies)
+            .filter(self.model.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+            .order_by(self.model.id)
+        )
+        result = await self.session.execute(query)
+        return self._to_schemas(result.all(), BookAvailability)
+
+    # Метод для построения условий поиска книг. Поиск по тексту использует
+    # вычисляемый столбец search_vector с GIN-индексом
+    def _search_filters(self, params: BookSearchParams) -> list:
+        filters = []
+        if params.q:
+            query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), params.q)
+            filters.append(self.model.search_vector.bool_op("@@")(query))
+        if params.genre:
+            filters.append(self.model.genre == params.genre)
+        if params.date_from:
+            filters.append(self.model.date_of_publication >= params.date_from)
+        if params.date_to:
+            filters.append(self.model.date_of_publication <= params.date_to)
+        if params.author_id is not None:
+            filters.append(
+                exists().where(
+                    BooksAuthorsORM.book_id == self.model.id,
+                    BooksAuthorsORM.author_id == params.author_id,
+                )
+            )
+        if params.available_only:
+            filters.append(self.model.available_copies > 0)
+        return filters
+
+    # Метод для поиска книг с авторами по тексту и фильтрам
+    async def search(
+        self,
+        params: BookSearchParams,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[BookWithRels]:
+        logger.debug("Поиск книг")
+        query = (
+            select(self.model)
+            .options(selectinload(self.model.authors))
+            .filter(*self._search_filters(params))
+        )
+        query = self._paginate(query, limit=limit, offset=offset, after_id=after_id)
+        result = await self.session.execute(query)
+        models = self._to_schemas(result.scalars().all(), BookWithRels)
+        logger.debug("Книги найдены успешно")
+        return models
+
+    # Метод для подсчета количества книг, подходящих под условия поиска
+    async def count_search(self, params: BookSearchParams) -> int:
+        query = select(func.count()).select_from(self.model).filter(*self._search_filters(params))
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    # Метод для потокового чтения всех книг с авторами. Авторы подгружаются
+    # отдельным запросом для каждой порции из batch_size книг
+    async def stream_book_with_rels(self, batch_size: int = 1000) -> AsyncIterator[BookWithRels]:
+        logger.debug("Потоковое получение книг")
+        query = (
+            select(self.model)
+            .options(selectinload(self.model.authors))
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream_scalars(query)
+        async for one in result:
+            yield BookWithRels.model_validate(one, from_attributes=True)
+
+    # Метод для атомарного изменения количества доступных копий книги одним UPDATE.
+    # Условие, что копий не станет меньше нуля, проверяется в том же запросе,
+    # поэтому последнюю копию не смогут выдать двум читателям одновременно.
+    # Возвращает None, если книга не найдена или копий недостаточно
+    async def change_available_copies(self, book_id: int, delta: int) -> Book | None:
+        logger.debug("Изменение количества доступных копий книги")
+        stmt = (
+            update(self.model)
+            .filter(self.model.id == book_id, self.model.available_copies + delta >= 0)
+            .values(available_copies=self.model.available_copies + delta)
+            .returning(self.model)
+        )
+        result = await self.session.execute(stmt)
+        model = result.scalars().one_or_none()
+        if model is None:
+            logger.error("Количество доступных копий книги не изменено")
+            return None
+        return self.schema.model_validate(model, from_attributes=True)
+
 
 class BooksAuthorsCRUD(BaseCRUD):
     model = BooksAuthorsORM
     schema = BooksAuthors
 
-    async def edit_authors_ids(self, new_authors_ids: list[int] | None, book_id: int) -> None:
-        logger.info("Изменение авторов книги")
-        new_authors_ids = new_authors_ids or []
-        get_current_authors_ids_query = select(self.model.author_id).filter_by(book_id=book_id)
-        result = await self.session.execute(get_current_authors_ids_query)
-        current_authors_ids = result.scalars().all()
-        ids_to_delete = list(set(current_authors_ids) - set(new_authors_ids))
-        ids_to_insert = list(set(new_authors_ids) - set(current_authors_ids))
+    # Метод для замены авторов книги одним запросом. Удаление лишних связей и добавление
+    # новых выполняются в CTE, а сам запрос возвращает новый список авторов книги
+    async def edit_authors_ids(self, new_authors_ids: list[int], book_id: int) -> list[Author]:
+        logger.debug("Изменение авторов книги")
+        new_authors_ids = sorted(set(new_authors_ids))
+        delete_cte = (
+            delete(self.model)
+            .filter(self.model.book_id == book_id, self.model.author_id.not_in(new_authors_ids))
+            .cte("deleted_authors")
+        )
+        query = (
+            select(AuthorsORM)
+            .filter(AuthorsORM.id.in_(new_authors_ids))
+            .order_by(AuthorsORM.id)
+            .add_cte(delete_cte)
+        )
+        if new_authors_ids:
+            insert_cte = (
+                pg_insert(self.model)
+                .values([{"book_id": book_id, "author_id": a_id} for a_id in new_authors_ids])
+                .on_conflict_do_nothing(index_elements=["book_id", "author_id"])
+                .cte("inserted_authors")
+            )
+            query = query.add_cte(insert_cte)
 
         try:
-            if ids_to_delete:
-                delete_stmt = delete(self.model).filter(
-                    self.model.book_id == book_id, self.model.author_id.in_(ids_to_delete)
-                )
-                await self.session.execute(delete_stmt)
-
-            if ids_to_insert:
-                insert_stmt = insert(self.model).values(
-                    [{"book_id": book_id, "author_id": a_id} for a_id in ids_to_insert]
-                )
-                await self.session.execute(insert_stmt)
-            logger.info("Авторы книги изменены успешно")
+            result = await self.session.execute(query)
+            logger.debug("Авторы книги изменены успешно")
         except IntegrityError:
             logger.error("Ошибка изменения авторов книги")
             raise InvalidInputException
+        return self._to_schemas(result.scalars().all(), Author)
+
+    # Метод для получения текущих авторов книги
+    async def get_book_authors(self, book_id: int) -> list[Author]:
+        logger.debug("Получение авторов книги")
+        query = (
+            select(AuthorsORM)
+            .join(self.model, self.model.author_id == AuthorsORM.id)
+            .filter(self.model.book_id == book_id)
+            .order_by(AuthorsORM.id)
+        )
+        result = await self.session.execute(query)
+        return self._to_schemas(result.scalars().all(), Author)
@@ -1,8 +1,204 @@
-from src.schemas.borrow import Borrow
+from datetime import date
+from typing import AsyncIterator, Literal
+
+from sqlalchemy import Date, Integer, distinct, func, literal, select, type_coerce, update
+
+from src.schemas.borrow import (
+    Borrow,
+    BorrowWithBook,
+    OverdueBookReport,
+    OverdueBorrow,
+    OverdueReaderReport,
+    ReaderBorrowsParams,
+)
+from src.models.book import BooksORM
 from src.models.borrow import BorrowsORM
+from src.models.user import UsersORM
 from src.CRUD.base import BaseCRUD
+from src.logger import logger
 
 
 class BorrowCRUD(BaseCRUD):
     model = BorrowsORM
     schema = Borrow
+
+    # Метод для закрытия займа одним UPDATE. Займ закрывается, только если он еще
+    # не возвращен и дата возврата позже даты займа.
+    # Возвращает None, если займ не найден или условия не выполнены
+    async def close_borrow(self, id: int, return_date: date) -> Borrow | None:
+        logger.debug("Закрытие займа")
+        stmt = (
+            update(self.model)
+            .filter(
+                self.model.id == id,
+                self.model.is_returned.is_(False),
+                self.model.borrow_date < return_date,
+            )
+            .values(is_returned=True, return_date=return_date)
+            .returning(self.model)
+        )
+        result = await self.session.execute(stmt)
+        model = result.scalars().one_or_none()
+        if model is None:
+            logger.error("Займ не закрыт")
+            return None
+        return self.schema.model_validate(model, from_attributes=True)
+
+    # Метод для построения условий отбора займов читателя
+    def _reader_filters(self, reader_id: int, params: ReaderBorrowsParams) -> list:
+        filters = [self.model.reader_id == reader_id]
+        if params.status != "all":
+            filters.append(self.model.is_returned.is_(params.status == "closed"))
+        if params.date_from:
+            filters.append(self.model.borrow_date >= params.date_from)
+        if params.date_to:
+            filters.append(self.model.borrow_date <= params.date_to)
+        return filters
+
+    # Метод для получения страницы займов читателя. Названия книг (with_titles)
+    # добавляются соединением с таблицей книг в том же запросе
+    async def get_by_reader(
+        self,
+        reader_id: int,
+        params: ReaderBorrowsParams,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[Borrow] | list[BorrowWithBook]:
+        logger.debug("Получение займов читателя")
+        schema = BorrowWithBook if params.with_titles else Borrow
+        query = select(*self._columns(Borrow)).filter(*self._reader_filters(reader_id, params))
+        if params.with_titles:
+            query = query.add_columns(BooksORM.title.label("book_title")).join(
+                BooksORM, BooksORM.id == self.model.book_id
+            )
+        query = self._paginate(
+            query,
+            limit=limit,
+            offset=offset,
+            after_id=after_id,
+            descending=params.order == "desc",
+        )
+        result = await self.session.execute(query)
+        return self._to_schemas(result.all(), schema)
+
+    # Метод для подсчета займов читателя, подходящих под фильтры
+    async def count_by_reader(self, reader_id: int, params: ReaderBorrowsParams) -> int:
+        query = (
+            select(func.count())
+            .select_from(self.model)
+            .filter(*self._reader_filters(reader_id, params))
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    # Метод для построения условий отбора просроченных займов. Условие is_returned = false
+    # совпадает с условием частичных индексов ix_borrows_open_return_date (подсчет)
+    # и ix_borrows_open_id (страницы в порядке id), поэтому запросы читают только
+    # незавершенные займы по индексу
+    def _overdue_filters(self, as_of: date) -> list:
+        return [self.model.is_returned == False, self.model.return_date < as_of]  # noqa: E712
+
+    # Метод для построения запроса просроченных займов с количеством дней просрочки,
+    # которое вычисляется в базе
+    def _overdue_query(self, as_of: date):
+        days_overdue = type_coerce(literal(as_of, Date) - self.model.return_date, Integer)
+        return select(*self._columns(Borrow), days_overdue.label("days_overdue")).filter(
+            *self._overdue_filters(as_of)
+        )
+
+    # Метод для получения страницы просроченных займов на дату as_of
+    async def get_overdue(
+        self,
+        as_of: date,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[OverdueBorrow]:
+        logger.debug("Получение просроченных займов")
+        query = self._paginate(
+            self._overdue_query(as_of), limit=limit, offset=offset, after_id=after_id
+        )
+        result = await self.session.execute(query)
+        return self._to_schemas(result.all(), OverdueBorrow)
+
+    # Метод для потокового чтения всех просроченных займов на дату as_of.
+    # Строки читаются серверным курсором частями по batch_size
+    async def stream_overdue(
+        self, as_of: date, batch_size: int = 1000
+    ) -> AsyncIterator[OverdueBorrow]:
+        logger.debug("Потоковое получение просроченных займов")
+        query = (
+            self._overdue_query(as_of)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(query)
+        async for row in result:
+            yield OverdueBorrow.model_validate(row, from_attributes=True)
+
+    # Метод для подсчета просроченных займов на дату as_of: всех займов
+    # или различных читателей (by="reader") и книг (by="book")
+    async def count_overdue(
+        self, as_of: date, by: Literal["borrow", "reader", "book"] = "borrow"
+    ) -> int:
+        column = {"reader": self.model.reader_id, "book": self.model.book_id}.get(by)
+        count = func.count() if column is None else func.count(distinct(column))
+        query = select(count).select_from(self.model).filter(*self._overdue_filters(as_of))
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    # Метод для получения читателей с просроченными займами: количество просроченных
+    # займов и самая ранняя дата возврата. Группировка выполняется в базе
+    async def get_overdue_by_reader(
+        self,
+        as_of: date,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[OverdueReaderReport]:
+        logger.debug("Получение просроченных займов по читателям")
+        query = (
+            select(
+                UsersORM.id,
+                UsersORM.name,
+                UsersORM.email,
+                func.count(self.model.id).label("overdue_count"),
+                func.min(self.model.return_date).label("oldest_return_date"),
+            )
+            .join(self.model, self.model.reader_id == UsersORM.id)
+            .filter(*self._overdue_filters(as_of))
+            .group_by(UsersORM.id)
+        )
+        query = self._paginate(
+            query, limit=limit, offset=offset, after_id=after_id, id_column=UsersORM.id
+        )
+        result = await self.session.execute(query)
+        return self._to_schemas(result.all(), OverdueReaderReport)
+
+    # Метод для получения книг с просроченными займами: количество просроченных
+    # займов и самая ранняя дата возврата. Группировка выполняется в базе
+    async def get_overdue_by_book(
+        self,
+        as_of: date,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[OverdueBookReport]:
+        logger.debug("Получение просроченных займов по книгам")
+        query = (
+            select(
+                BooksORM.id,
+                BooksORM.title,
+                func.count(self.model.id).label("overdue_count"),
+                func.min(self.model.return_date).label("oldest_return_date"),
+            )
+            .join(self.model, self.model.book_id == BooksORM.id)
+            .filter(*self._overdue_filters(as_of))
+            .group_by(BooksORM.id)
+        )
+        query = self._paginate(
+            query, limit=limit, offset=offset, after_id=after_id, id_column=BooksORM.id
+        )
+        result = await self.session.execute(query)
+        return self._to_schemas(result.all(), OverdueBookReport)
@@ -1,5 +1,5 @@
 from pydantic import EmailStr
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.exc import NoResultFound
 
 from src.exceptions import UserNotFoundException
@@ -14,13 +14,33 @@ class UserCRUD(BaseCRUD):
     schema = User
 
     async def get_user_by_email(self, email: EmailStr) -> User:
-        logger.info("Получение пользователя по email")
+        logger.debug("Получение пользователя по email")
         query = select(self.model).filter_by(email=email)
         result = await self.session.execute(query)
         try:
             model = self.schema.model_validate(result.scalars().one(), from_attributes=True)
-            logger.info("Пользователь получен успешно")
+            logger.debug("Пользователь получен успешно")
         except NoResultFound:
             logger.error("Пользователь не найден")
             raise UserNotFoundException
         return model
+
+    # Метод для атомарного изменения счетчика взятых книг одним UPDATE.
+    # Ограничения (не меньше нуля и не больше max_books) проверяются в том же запросе.
+    # Возвращает None, если пользователь не найден или ограничение нарушено
+    async def change_borrowed_books(
+        self, user_id: int, delta: int, max_books: int | None = None
+    ) -> User | None:
+        logger.debug("Изменение количества взятых пользователем книг")
+        stmt = update(self.model).filter(
+            self.model.id == user_id, self.model.borrowed_books + delta >= 0
+        )
+        if max_books is not None:
+            stmt = stmt.filter(self.model.borrowed_books + delta <= max_books)
+        stmt = stmt.values(borrowed_books=self.model.borrowed_books + delta).returning(self.model)
+        result = await self.session.execute(stmt)
+        model = result.scalars().one_or_none()
+        if model is None:
+            logger.error("Количество взятых пользователем книг не изменено")
+            return None
+        return self.schema.model_validate(model, from_attributes=True)
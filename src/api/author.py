@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Request
 
 from src.exceptions import (
     AuthorNotFoundException,
@@ -7,8 +7,19 @@ from src.exceptions import (
     InvalidInputHTTPException,
 )
 from src.services.author import AuthorService
-from src.api.dependencies import DBDep, PaginationDep, AdminUserDep
+from src.api.dependencies import (
+    DBDep,
+    IfNoneMatchDep,
+    PaginationDep,
+    AdminUserDep,
+    ReadDBDep,
+)
 from src.schemas.author import AuthorAdd, AuthorPatch
+from src.schemas.views import ListView
+from src.utils.bulk import IMPORT_OPENAPI_EXTRA, parse_rows
+from src.utils.etag import etag_matches, json_response_with_etag, not_modified_response
+from src.utils.export import ExportFormat, stream_export
+from src.utils.responses import FastJSONResponse
 from src.logger import logger
 
 
@@ -54,21 +65,86 @@ async def add_author(
     return {"status": "OK", "data": new_author}
 
 
+@router.post(
+    "/import",
+    summary="Массово добавляет авторов",
+    description=(
+        """Этот эндпоинт добавляет в базу данных сразу много авторов. 
+        Ожидает JSON-массив (application/json), NDJSON (application/x-ndjson) 
+        или CSV с заголовком (text/csv) с именем, биографией и датой рождения авторов. 
+        Возвращает статус операции, id добавленных авторов и ошибки по номерам строк."""
+    ),
+    openapi_extra=IMPORT_OPENAPI_EXTRA,
+)
+async def import_authors(db: DBDep, admin_user: AdminUserDep, request: Request):
+    logger.info("Массовое добавление авторов")
+    try:
+        rows = parse_rows(
+            body=await request.body(), content_type=request.headers.get("content-type", "")
+        )
+    except InvalidInputException:
+        logger.error("Ошибка массового добавления авторов: неверный формат данных")
+        raise InvalidInputHTTPException
+    report = await AuthorService(db).import_authors(rows=rows)
+    logger.info(
+        "Массовое добавление авторов завершено. Добавлено: %s, ошибок: %s",
+        len(report.created_ids),
+        len(report.errors),
+    )
+    return {"status": "OK", "data": report}
+
+
 @router.get(
     "",
     summary="Возвращает список всех авторов",
     description=(
         """Этот эндпоинт возвращает список всех авторов из базы данных со страничной пагинацией. 
-        Ожидает количество авторов на странице и номер страницы. 
-        Возвращает статус операции и данные авторов для указанной страницы."""
+        Ожидает количество авторов на странице и номер страницы либо курсор after_id 
+        (id последней полученной записи) для пагинации по курсору. 
+        Ожидает вариант представления view: summary (только id и имя) или detail (по умолчанию). 
+        Возвращает статус операции, данные авторов для указанной страницы, общее количество авторов 
+        (только в постраничном режиме) и курсор next_after_id для следующей страницы."""
     ),
 )
-async def get_authors(db: DBDep, admin_user: AdminUserDep, pagination: PaginationDep):
+async def get_authors(
+    db: ReadDBDep, admin_user: AdminUserDep, pagination: PaginationDep, view: ListView = "detail"
+):
     logger.info("Получение списка авторов")
-    authors = await AuthorService(db).get_authors()
-    authors = authors[pagination.per_page * (pagination.page - 1) :][: pagination.per_page]
+    author_service = AuthorService(db)
+    authors = await author_service.get_authors(
+        limit=pagination.per_page,
+        offset=pagination.offset,
+        after_id=pagination.after_id,
+        view=view,
+    )
+    total = None if pagination.is_cursor else await author_service.count_authors()
     logger.info("Список авторов получен успешно")
-    return {"status": "OK", "data": authors}
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": authors,
+            "total": total,
+            "next_after_id": pagination.next_after_id(authors),
+        }
+    )
+
+
+@router.get(
+    "/export",
+    summary="Выгружает всех авторов",
+    description=(
+        """Этот эндпоинт выгружает всех авторов потоковым ответом. 
+        Ожидает формат выгрузки: ndjson или csv. 
+        Возвращает файл с авторами, память сервера не зависит от количества авторов."""
+    ),
+)
+async def export_authors(admin_user: AdminUserDep, format: ExportFormat = "ndjson"):
+    logger.info("Выгрузка авторов в формате %s", format)
+    return stream_export(
+        export=lambda db: AuthorService(db).export_authors(),
+        export_format=format,
+        filename="authors",
+    )
 
 
 @router.get(
@@ -77,18 +153,26 @@ async def get_authors(db: DBDep, admin_user: AdminUserDep, pagination: Paginatio
     description=(
         """Этот эндпоинт возвращает информацию об авторе по его id. 
         Ожидает id автора. 
-        Возвращает статус операции и данные запрашиваемого автора."""
+        Возвращает статус операции и данные запрашиваемого автора с заголовком ETag. 
+        Если переданный в If-None-Match ETag не изменился, возвращает 304 без тела."""
     ),
 )
-async def get_author_by_id(db: DBDep, admin_user: AdminUserDep, id: int):
+async def get_author_by_id(
+    db: ReadDBDep, admin_user: AdminUserDep, id: int, if_none_match: IfNoneMatchDep = None
+):
     logger.info("Получение автора по id")
+    author_service = AuthorService(db)
     try:
-        author = await AuthorService(db).get_author_by_id(id=id)
+        etag = await author_service.get_author_etag(id=id)
+        if etag_matches(if_none_match, etag):
+            logger.info("Автор не изменился")
+            return not_modified_response(etag)
+        author = await author_service.get_author_by_id(id=id)
         logger.info("Автор получен успешно")
     except AuthorNotFoundException:
         logger.error("Автор не найден")
         raise AuthorNotFoundHTTPException
-    return {"status": "OK", "data": author}
+    return json_response_with_etag({"status": "OK", "data": author}, etag)
 
 
 @router.put(
@@ -117,7 +201,7 @@ async def edit_author(
         }
     ),
 ):
-    logger.info(f"Обновление данных автора с id: {id}")
+    logger.info("Обновление данных автора с id: %s", id)
     try:
         edited_author = await AuthorService(db).edit_author(id=id, author_data=author_data)
         logger.info("Данные автора обновлены успешно")
@@ -125,7 +209,7 @@ async def edit_author(
         logger.error("Ошибка обновления данных автора: неверный ввод")
         raise InvalidInputHTTPException
     except AuthorNotFoundException:
-        logger.error(f"Автор с id {id} не найден")
+        logger.error("Автор с id %s не найден", id)
         raise AuthorNotFoundHTTPException
     return {"status": "OK", "data": edited_author}
 
@@ -140,11 +224,11 @@ async def edit_author(
     ),
 )
 async def delete_author(db: DBDep, admin_user: AdminUserDep, id: int):
-    logger.info(f"Удаление автора с id: {id}")
+    logger.info("Удаление автора с id: %s", id)
     try:
         deleted_author = await AuthorService(db).delete_author(id=id)
-        logger.info(f"Автор с id {id} удален успешно")
+        logger.info("Автор с id %s удален успешно", id)
     except AuthorNotFoundException:
-        logger.error(f"Автор с id {id} не найден")
+        logger.error("Автор с id %s не найден", id)
         raise AuthorNotFoundHTTPException
     return {"status": "OK", "data": deleted_author}
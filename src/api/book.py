@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Body
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends, Request
 
 from src.exceptions import (
     BookNotFoundException,
@@ -9,8 +11,25 @@ from src.exceptions import (
     ObjectNotFoundHTTPException,
 )
 from src.services.book import BookService
-from src.api.dependencies import DBDep, PaginationDep, AdminUserDep, UserDep
-from src.schemas.book import BookAddRequest, BookPatchRequest
+from src.api.dependencies import (
+    DBDep,
+    IfNoneMatchDep,
+    PaginationDep,
+    AdminUserDep,
+    ReadDBDep,
+    UserDep,
+)
+from src.schemas.book import (
+    BookAddRequest,
+    BookAvailabilityRequest,
+    BookPatchRequest,
+    BookSearchParams,
+)
+from src.schemas.views import ListView
+from src.utils.bulk import IMPORT_OPENAPI_EXTRA, parse_rows
+from src.utils.etag import etag_json_response, etag_matches, not_modified_response
+from src.utils.export import ExportFormat, book_to_csv_row, stream_export
+from src.utils.responses import FastJSONResponse
 from src.logger import logger
 
 
@@ -77,21 +96,149 @@ async def add_book(
     return {"status": "OK", "data": new_book}
 
 
+@router.post(
+    "/import",
+    summary="Массово добавляет книги",
+    description=(
+        """Этот эндпоинт добавляет в базу данных сразу много книг. 
+        Ожидает JSON-массив (application/json), NDJSON (application/x-ndjson) 
+        или CSV с заголовком (text/csv, id авторов в author_ids через ";") с данными книг. 
+        Возвращает статус операции, id добавленных книг и ошибки по номерам строк."""
+    ),
+    openapi_extra=IMPORT_OPENAPI_EXTRA,
+)
+async def import_books(db: DBDep, admin_user: AdminUserDep, request: Request):
+    logger.info("Массовое добавление книг")
+    try:
+        rows = parse_rows(
+            body=await request.body(),
+            content_type=request.headers.get("content-type", ""),
+            list_fields=["author_ids"],
+        )
+    except InvalidInputException:
+        logger.error("Ошибка массового добавления книг: неверный формат данных")
+        raise InvalidInputHTTPException
+    report = await BookService(db).import_books(rows=rows)
+    logger.info(
+        "Массовое добавление книг завершено. Добавлено: %s, ошибок: %s",
+        len(report.created_ids),
+        len(report.errors),
+    )
+    return {"status": "OK", "data": report}
+
+
+@router.post(
+    "/availability",
+    summary="Возвращает наличие экземпляров нескольких книг",
+    description=(
+        """Этот эндпоинт возвращает количество доступных копий сразу для нескольких книг. 
+        Ожидает список id книг (не больше 500). 
+        Возвращает статус операции и список id книг с количеством доступных копий, 
+        отсортированный по id. Несуществующие книги в список не попадают."""
+    ),
+)
+async def get_books_availability(
+    db: ReadDBDep,
+    user: UserDep,
+    availability_data: BookAvailabilityRequest = Body(
+        openapi_examples={"1": {"summary": "books", "value": {"ids": [1, 2, 3]}}}
+    ),
+):
+    logger.info("Получение наличия экземпляров %s книг", len(availability_data.ids))
+    availability = await BookService(db).get_books_availability(ids=availability_data.ids)
+    logger.info("Наличие экземпляров книг получено успешно")
+    return FastJSONResponse({"status": "OK", "data": availability})
+
+
 @router.get(
     "",
     summary="Возвращает список всех книг",
     description=(
         """Этот эндпоинт возвращает список всех книг из базы данных со страничной пагинацией. 
-        Ожидает количество книг на странице и номер страницы. 
-        Возвращает статус операции и данные книг для указанной страницы."""
+        Ожидает количество книг на странице и номер страницы либо курсор after_id 
+        (id последней полученной записи) для пагинации по курсору. 
+        Ожидает вариант представления view: summary (без описаний, авторы только с именами) 
+        или detail (по умолчанию). 
+        Возвращает статус операции, данные книг для указанной страницы, общее количество книг 
+        (только в постраничном режиме) и курсор next_after_id для следующей страницы."""
     ),
 )
-async def get_books(db: DBDep, user: UserDep, pagination: PaginationDep):
+async def get_books(db: DBDep, user: UserDep, pagination: PaginationDep, view: ListView = "detail"):
     logger.info("Получение списка книг")
-    books = await BookService(db).get_books()
-    books = books[pagination.per_page * (pagination.page - 1) :][: pagination.per_page]
+    book_service = BookService(db)
+    books = await book_service.get_books(
+        limit=pagination.per_page,
+        offset=pagination.offset,
+        after_id=pagination.after_id,
+        view=view,
+    )
+    # В режиме курсора общее количество не считается, чтобы не сканировать всю таблицу
+    total = None if pagination.is_cursor else await book_service.count_books()
     logger.info("Список книг получен успешно")
-    return {"status": "OK", "data": books}
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": books,
+            "total": total,
+            "next_after_id": pagination.next_after_id(books),
+        }
+    )
+
+
+@router.get(
+    "/search",
+    summary="Ищет книги",
+    description=(
+        """Этот эндпоинт ищет книги по названию и описанию (полнотекстовый поиск) 
+        с фильтрами по жанру, диапазону дат публикации, автору и наличию свободных копий. 
+        Поддерживает такую же пагинацию, как и список книг. 
+        Возвращает статус операции, найденные книги, их общее количество 
+        (только в постраничном режиме) и курсор next_after_id для следующей страницы."""
+    ),
+)
+async def search_books(
+    db: ReadDBDep,
+    user: UserDep,
+    pagination: PaginationDep,
+    search: Annotated[BookSearchParams, Depends()],
+):
+    logger.info("Поиск книг")
+    book_service = BookService(db)
+    books = await book_service.search_books(
+        params=search,
+        limit=pagination.per_page,
+        offset=pagination.offset,
+        after_id=pagination.after_id,
+    )
+    total = None if pagination.is_cursor else await book_service.count_search_books(params=search)
+    logger.info("Поиск книг выполнен успешно")
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": books,
+            "total": total,
+            "next_after_id": pagination.next_after_id(books),
+        }
+    )
+
+
+@router.get(
+    "/export",
+    summary="Выгружает все книги",
+    description=(
+        """Этот эндпоинт выгружает все книги с авторами потоковым ответом. 
+        Ожидает формат выгрузки: ndjson или csv (id авторов в author_ids через ";"). 
+        Возвращает файл с книгами, память сервера не зависит от количества книг."""
+    ),
+)
+async def export_books(admin_user: AdminUserDep, format: ExportFormat = "ndjson"):
+    logger.info("Выгрузка книг в формате %s", format)
+    return stream_export(
+        export=lambda db: BookService(db).export_books(),
+        export_format=format,
+        filename="books",
+        to_row=book_to_csv_row,
+    )
 
 
 @router.get(
@@ -100,18 +247,27 @@ async def get_books(db: DBDep, user: UserDep, pagination: PaginationDep):
     description=(
         """Этот эндпоинт возвращает информацию о книге по её id. 
         Ожидает ID книги. 
-        Возвращает статус операции и данные запрашиваемой книги."""
+        Возвращает статус операции и данные запрашиваемой книги с заголовком ETag. 
+        Если переданный в If-None-Match ETag не изменился, возвращает 304 без тела."""
     ),
 )
-async def get_book_by_id(user: UserDep, db: DBDep, id: int):
-    logger.info(f"Получение книги по id: {id}")
+async def get_book_by_id(user: UserDep, db: DBDep, id: int, if_none_match: IfNoneMatchDep = None):
+    logger.info("Получение книги по id: %s", id)
+    book_service = BookService(db)
+    etag = await book_service.get_book_etag(id=id)
+    if etag is not None and etag_matches(if_none_match, etag):
+        logger.info("Книга не изменилась")
+        return not_modified_response(etag)
+
     try:
-        book = await BookService(db).get_book_by_id(id=id)
+        book = await book_service.get_book_by_id(id=id)
         logger.info("Книга получена успешно")
     except ObjectNotFoundException:
         logger.error("Книга не найдена")
         raise ObjectNotFoundHTTPException
-    return {"status": "OK", "data": book}
+    response = etag_json_response({"status": "OK", "data": book}, if_none_match)
+    await book_service.save_book_etag(id=id, etag=response.headers["ETag"])
+    return response
 
 
 @router.put(
@@ -151,12 +307,12 @@ async def edit_book(
         }
     ),
 ):
-    logger.info(f"Редактирование книги с id: {id}")
+    logger.info("Редактирование книги с id: %s", id)
     try:
         edited_book = await BookService(db).edit_book(id=id, book_data=book_data)
-        logger.info(f"Книга с id: {id} успешно отредактирована")
+        logger.info("Книга с id: %s успешно отредактирована", id)
     except BookNotFoundException:
-        logger.error(f"Книга с id: {id} не найдена")
+        logger.error("Книга с id: %s не найдена", id)
         raise BookNotFoundHTTPException
     except InvalidInputException:
         logger.error("Ошибка редактирования книги: неверный ввод")
@@ -174,11 +330,11 @@ async def edit_book(
     ),
 )
 async def delete_book(db: DBDep, admin_user: AdminUserDep, id: int):
-    logger.info(f"Удаление книги с id: {id}")
+    logger.info("Удаление книги с id: %s", id)
     try:
         deleted_book = await BookService(db).delete_book(id=id)
-        logger.info(f"Книга с id: {id} успешно удалена")
+        logger.info("Книга с id: %s успешно удалена", id)
     except BookNotFoundException:
-        logger.error(f"Книга с id: {id} не найдена")
+        logger.error("Книга с id: %s не найдена", id)
         raise BookNotFoundHTTPException
     return {"status": "OK", "data": deleted_book}
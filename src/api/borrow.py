@@ -1,20 +1,27 @@
 from datetime import date
 
-from fastapi import APIRouter, Body
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends
 
 from src.exceptions import (
     BookAlreadyReturnedException,
     BookAlreadyReturnedHTTPException,
     BookNotFoundException,
     BookNotFoundHTTPException,
+    BorrowNotFoundException,
+    BorrowNotFoundHTTPException,
     MaxBooksLimitExceededException,
     MaxBooksLimitExceededHTTPException,
     NoAvailableCopiesException,
     NoAvailableCopiesHTTPException,
+    PermissionDeniedHTTPException,
 )
 from src.services.borrow import BorrowService
-from src.api.dependencies import DBDep, PaginationDep, UserDep, AdminUserDep
-from src.schemas.borrow import BorrowAddRequest
+from src.api.dependencies import DBDep, PaginationDep, ReadDBDep, UserDep, AdminUserDep
+from src.schemas.borrow import BorrowAddRequest, ReaderBorrowsParams
+from src.utils.export import ExportFormat, stream_export
+from src.utils.responses import FastJSONResponse
 from src.logger import logger
 
 
@@ -67,31 +74,211 @@ async def add_borrow(
     summary="Возвращает список всех займов",
     description=(
         """Этот эндпоинт возвращает список всех займов из базы данных со страничной пагинацией. 
-        Ожидает количество займов на странице и номер страницы. 
-        Возвращает статус операции и данные займов для указанной страницы."""
+        Ожидает количество займов на странице и номер страницы либо курсор after_id 
+        (id последней полученной записи) для пагинации по курсору. 
+        Возвращает статус операции, данные займов для указанной страницы, общее количество займов 
+        (только в постраничном режиме) и курсор next_after_id для следующей страницы."""
     ),
 )
-async def get_borrows(db: DBDep, admin_user: AdminUserDep, pagin: PaginationDep):
+async def get_borrows(db: ReadDBDep, admin_user: AdminUserDep, pagin: PaginationDep):
     logger.info("Получение списка займов")
-    borrows = await BorrowService(db).get_borrows()
-    borrows = borrows[pagin.per_page * (pagin.page - 1) :][: pagin.per_page]
+    borrow_service = BorrowService(db)
+    borrows = await borrow_service.get_borrows(
+        limit=pagin.per_page, offset=pagin.offset, after_id=pagin.after_id
+    )
+    total = None if pagin.is_cursor else await borrow_service.count_borrows()
     logger.info("Список займов получен успешно")
-    return {"status": "OK", "data": borrows}
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": borrows,
+            "total": total,
+            "next_after_id": pagin.next_after_id(borrows),
+        }
+    )
+
+
+@router.get(
+    "/export",
+    summary="Выгружает историю займов",
+    description=(
+        """Этот эндпоинт выгружает все займы потоковым ответом. 
+        Ожидает формат выгрузки: ndjson или csv. 
+        Возвращает файл с займами, память сервера не зависит от количества займов."""
+    ),
+)
+async def export_borrows(admin_user: AdminUserDep, format: ExportFormat = "ndjson"):
+    logger.info("Выгрузка займов в формате %s", format)
+    return stream_export(
+        export=lambda db: BorrowService(db).export_borrows(),
+        export_format=format,
+        filename="borrows",
+    )
+
+
+@router.get(
+    "/overdue",
+    summary="Возвращает просроченные займы",
+    description=(
+        """Этот эндпоинт возвращает незавершенные займы, срок возврата которых прошел, 
+        с количеством дней просрочки. Ожидает дату отчета as_of (по умолчанию текущая дата) 
+        и такую же пагинацию, как и список займов. 
+        Возвращает статус операции, просроченные займы для указанной страницы, их общее количество 
+        (только в постраничном режиме) и курсор next_after_id для следующей страницы."""
+    ),
+)
+async def get_overdue_borrows(
+    db: ReadDBDep, admin_user: AdminUserDep, pagin: PaginationDep, as_of: date | None = None
+):
+    logger.info("Получение просроченных займов")
+    borrow_service = BorrowService(db)
+    borrows = await borrow_service.get_overdue(
+        as_of=as_of, limit=pagin.per_page, offset=pagin.offset, after_id=pagin.after_id
+    )
+    total = None if pagin.is_cursor else await borrow_service.count_overdue(as_of=as_of)
+    logger.info("Просроченные займы получены успешно")
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": borrows,
+            "total": total,
+            "next_after_id": pagin.next_after_id(borrows),
+        }
+    )
+
+
+@router.get(
+    "/overdue/export",
+    summary="Выгружает просроченные займы",
+    description=(
+        """Этот эндпоинт выгружает все просроченные займы потоковым ответом. 
+        Ожидает дату отчета as_of (по умолчанию текущая дата) и формат выгрузки: ndjson или csv. 
+        Возвращает файл с просроченными займами, память сервера не зависит от их количества."""
+    ),
+)
+async def export_overdue_borrows(
+    admin_user: AdminUserDep, as_of: date | None = None, format: ExportFormat = "ndjson"
+):
+    logger.info("Выгрузка просроченных займов в формате %s", format)
+    return stream_export(
+        export=lambda db: BorrowService(db).export_overdue(as_of=as_of),
+        export_format=format,
+        filename="overdue_borrows",
+    )
+
+
+@router.get(
+    "/overdue/readers",
+    summary="Возвращает читателей с просроченными займами",
+    description=(
+        """Этот эндпоинт возвращает читателей, у которых есть просроченные займы, 
+        с количеством просроченных займов и самой ранней датой возврата. 
+        Ожидает дату отчета as_of (по умолчанию текущая дата) и пагинацию по id читателя. 
+        Возвращает статус операции, данные читателей для указанной страницы, их общее количество 
+        (только в постраничном режиме) и курсор next_after_id для следующей страницы."""
+    ),
+)
+async def get_overdue_by_reader(
+    db: ReadDBDep, admin_user: AdminUserDep, pagin: PaginationDep, as_of: date | None = None
+):
+    logger.info("Получение просроченных займов по читателям")
+    borrow_service = BorrowService(db)
+    readers = await borrow_service.get_overdue_by_reader(
+        as_of=as_of, limit=pagin.per_page, offset=pagin.offset, after_id=pagin.after_id
+    )
+    total = (
+        None if pagin.is_cursor else await borrow_service.count_overdue(as_of=as_of, by="reader")
+    )
+    logger.info("Просроченные займы по читателям получены успешно")
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": readers,
+            "total": total,
+            "next_after_id": pagin.next_after_id(readers),
+        }
+    )
+
+
+@router.get(
+    "/overdue/books",
+    summary="Возвращает книги с просроченными займами",
+    description=(
+        """Этот эндпоинт возвращает книги, у которых есть просроченные займы, 
+        с количеством просроченных займов и самой ранней датой возврата. 
+        Ожидает дату отчета as_of (по умолчанию текущая дата) и пагинацию по id книги. 
+        Возвращает статус операции, данные книг для указанной страницы, их общее количество 
+        (только в постраничном режиме) и курсор next_after_id для следующей страницы."""
+    ),
+)
+async def get_overdue_by_book(
+    db: ReadDBDep, admin_user: AdminUserDep, pagin: PaginationDep, as_of: date | None = None
+):
+    logger.info("Получение просроченных займов по книгам")
+    borrow_service = BorrowService(db)
+    books = await borrow_service.get_overdue_by_book(
+        as_of=as_of, limit=pagin.per_page, offset=pagin.offset, after_id=pagin.after_id
+    )
+    total = None if pagin.is_cursor else await borrow_service.count_overdue(as_of=as_of, by="book")
+    logger.info("Просроченные займы по книгам получены успешно")
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": books,
+            "total": total,
+            "next_after_id": pagin.next_after_id(books),
+        }
+    )
 
 
 @router.get(
     "/{id}",
     summary="Возвращает займы читателя",
     description=(
-        """Этот эндпоинт возвращает информацию о займе читателя.  
-        Возвращает статус операции и данные займов читателя."""
+        """Этот эндпоинт возвращает займы читателя по его id. Читатель может получить 
+        только свои займы, администратор - займы любого читателя. 
+        Ожидает id читателя, фильтры: status (all, open или closed), диапазон дат займа 
+        date_from и date_to, порядок order (asc или desc по порядку выдачи, по умолчанию desc), 
+        with_titles для добавления названий книг, и такую же пагинацию, как и список займов. 
+        Возвращает статус операции, займы читателя для указанной страницы, их общее количество 
+        (только в постраничном режиме) и курсор next_after_id для следующей страницы."""
     ),
 )
-async def get_my_borrows(db: DBDep, user: UserDep):
-    logger.info("Получение займов читателя")
-    borrows = await BorrowService(db).get_my_borrows(user_id=user.id)
+async def get_reader_borrows(
+    db: DBDep,
+    user: UserDep,
+    id: int,
+    pagin: PaginationDep,
+    params: Annotated[ReaderBorrowsParams, Depends()],
+):
+    # Займы читателя читаются из основной базы: только что взятая книга
+    # должна сразу появиться в списке, даже если реплика отстает
+    logger.info("Получение займов читателя с id: %s", id)
+    if user.id != id and not user.is_admin:
+        logger.error("Нет прав на получение займов читателя с id: %s", id)
+        raise PermissionDeniedHTTPException
+    borrow_service = BorrowService(db)
+    borrows = await borrow_service.get_reader_borrows(
+        reader_id=id,
+        params=params,
+        limit=pagin.per_page,
+        offset=pagin.offset,
+        after_id=pagin.after_id,
+    )
+    total = (
+        None
+        if pagin.is_cursor
+        else await borrow_service.count_reader_borrows(reader_id=id, params=params)
+    )
     logger.info("Займы читателя получены успешно")
-    return {"status": "OK", "data": borrows}
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": borrows,
+            "total": total,
+            "next_after_id": pagin.next_after_id(borrows),
+        }
+    )
 
 
 @router.patch(
@@ -104,12 +291,13 @@ async def get_my_borrows(db: DBDep, user: UserDep):
     ),
 )
 async def return_book(db: DBDep, id: int, return_date: date, user: UserDep):
-    logger.info(f"Завершение займа книги с id: {id}")
+    logger.info("Завершение займа книги с id: %s", id)
     try:
-        returned_borrow = await BorrowService(db).return_book(
-            id=id, return_date=return_date, user=user
-        )
+        returned_borrow = await BorrowService(db).return_book(id=id, return_date=return_date)
         logger.info("Займ успешно завершён")
+    except BorrowNotFoundException:
+        logger.error("Займ не найден")
+        raise BorrowNotFoundHTTPException
     except BookAlreadyReturnedException:
         logger.error("Займ уже был возвращён")
         raise BookAlreadyReturnedHTTPException
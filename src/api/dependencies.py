@@ -1,6 +1,6 @@
 from typing import Annotated, AsyncGenerator
 
-from fastapi import Depends, Query, Request
+from fastapi import Depends, Header, Query, Request
 from pydantic import BaseModel
 
 from src.exceptions import (
@@ -30,10 +30,45 @@ async def get_db() -> AsyncGenerator[DBManager, None]:
 DBDep = Annotated[DBManager, Depends(get_db)]
 
 
-# Модель для пагинации, которая будет использоваться в запросах
+# Функция для получения сессии только для чтения: запрос выполняется на реплике,
+# если они настроены. Используется в GET-эндпоинтах, которым не нужно видеть
+# только что сделанные изменения (реплика может немного отставать от основной базы).
+# Чтения, результат которых попадает в book_cache (список и карточки книг), идут
+# в основную базу: иначе после сброса кэша в него могли бы вернуться устаревшие данные реплики
+async def get_read_db() -> AsyncGenerator[DBManager, None]:
+    async with DBManager(session_factory=async_session_maker, read_only=True) as db:
+        yield db
+
+
+ReadDBDep = Annotated[DBManager, Depends(get_read_db)]
+
+# Заголовок If-None-Match для условных GET-запросов
+IfNoneMatchDep = Annotated[str | None, Header()]
+
+
+# Модель для пагинации, которая будет использоваться в запросах.
+# Поддерживает два режима: постраничный (page) и по курсору (after_id).
+# Если передан after_id, номер страницы игнорируется
 class Pagination(BaseModel):
     page: Annotated[int, Query(default=1, ge=1)]
     per_page: Annotated[int, Query(default=5, ge=1, lt=20)]
+    after_id: Annotated[int | None, Query(default=None, ge=0)]
+
+    @property
+    def is_cursor(self) -> bool:
+        return self.after_id is not None
+
+    # Смещение первой строки страницы для OFFSET в запросе к базе
+    @property
+    def offset(self) -> int:
+        return self.per_page * (self.page - 1)
+
+    # Курсор для запроса следующей страницы: id последней записи, если страница заполнена.
+    # Если записей меньше, чем per_page, следующей страницы нет
+    def next_after_id(self, items: list[BaseModel]) -> int | None:
+        if len(items) < self.per_page:
+            return None
+        return items[-1].id
 
 
 PaginationDep = Annotated[Pagination, Depends()]
@@ -48,9 +83,11 @@ def get_token(request: Request) -> str:
     return token
 
 
-def get_current_user_id(token: str = Depends(get_token)) -> int:
+# Зависимости FastAPI кэшируются в пределах запроса, поэтому токен
+# декодируется не больше одного раза за запрос
+async def get_current_user_id(token: str = Depends(get_token)) -> int:
     try:
-        data = AuthService().decode_token(token)
+        data = await AuthService().decode_token_cached(token)
     except TokenDecodeException:
         logger.error("Ошибка декодирования токена")
         raise TokenDecodeHTTPException
@@ -60,9 +97,8 @@ def get_current_user_id(token: str = Depends(get_token)) -> int:
     return data.get("user_id")
 
 
-async def get_current_user(db: DBDep, token: str = Depends(get_token)) -> User:
+async def get_current_user(db: DBDep, user_id: int = Depends(get_current_user_id)) -> User:
     try:
-        user_id = get_current_user_id(token)
         user = await UserService(db).get_user_by_id(user_id=user_id)
         return user
     except UserNotFoundException:
@@ -0,0 +1,97 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.api.dependencies import AdminUserDep
+from src.database import get_pool_status, pool_stats
+from src.utils.cache import book_cache, token_cache, user_cache
+from src.utils.executor import password_executor
+from src.utils.metrics import request_metrics
+from src.logger import logger
+
+
+router = APIRouter(prefix="/system", tags=["Система"])
+# Метрики отдаются без префикса и без аутентификации, по стандартному для Prometheus адресу
+metrics_router = APIRouter(tags=["Система"])
+
+
+@router.get(
+    "/pool",
+    summary="Возвращает состояние пула соединений с базой данных",
+    description=(
+        """Этот эндпоинт возвращает статистику пула соединений: размер пула, 
+        количество выданных и свободных соединений, переполнение и время ожидания соединения. 
+        Только для админов."""
+    ),
+)
+async def get_pool(admin_user: AdminUserDep):
+    logger.info("Получение состояния пула соединений")
+    return {"status": "OK", "data": get_pool_status()}
+
+
+@router.get(
+    "/password-hasher",
+    summary="Возвращает состояние пула хеширования паролей",
+    description=(
+        """Этот эндпоинт возвращает статистику пула потоков для хеширования паролей: 
+        количество потоков, задач в очереди и в работе, время ожидания в очереди. 
+        Только для админов."""
+    ),
+)
+async def get_password_hasher(admin_user: AdminUserDep):
+    logger.info("Получение состояния пула хеширования паролей")
+    return {"status": "OK", "data": password_executor.stats()}
+
+
+@router.get(
+    "/cache",
+    summary="Возвращает статистику кэшей",
+    description=(
+        """Этот эндпоинт возвращает для кэша каталога книг, кэша пользователей и кэша токенов 
+        хранилище, количество попаданий и промахов и долю попаданий. Только для админов."""
+    ),
+)
+async def get_cache(admin_user: AdminUserDep):
+    logger.info("Получение статистики кэшей")
+    return {
+        "status": "OK",
+        "data": {
+            "books": book_cache.stats(),
+            "users": user_cache.stats(),
+            "tokens": token_cache.stats(),
+        },
+    }
+
+
+# Функция для формирования метрик пула соединений и кэшей в формате Prometheus
+def _system_metrics() -> list[str]:
+    lines = [
+        "# TYPE db_pool_acquired_total counter",
+        f"db_pool_acquired_total {pool_stats.acquired}",
+        "# TYPE db_pool_failed_total counter",
+        f"db_pool_failed_total {pool_stats.failed}",
+        "# TYPE db_pool_wait_seconds_total counter",
+        f"db_pool_wait_seconds_total {pool_stats.total_wait}",
+        "# TYPE cache_hits_total counter",
+    ]
+    caches = {"books": book_cache, "users": user_cache, "tokens": token_cache}
+    lines += [f'cache_hits_total{{cache="{name}"}} {c.hits}' for name, c in caches.items()]
+    lines.append("# TYPE cache_misses_total counter")
+    lines += [f'cache_misses_total{{cache="{name}"}} {c.misses}' for name, c in caches.items()]
+    return lines
+
+
+@metrics_router.get(
+    "/metrics",
+    summary="Возвращает метрики в формате Prometheus",
+    description=(
+        """Этот эндпоинт возвращает метрики приложения в текстовом формате Prometheus: 
+        гистограммы времени ответа, количества и времени запросов к базе по маршрутам, 
+        статистику пула соединений и кэшей."""
+    ),
+    response_class=PlainTextResponse,
+)
+async def get_metrics():
+    return PlainTextResponse(
+        request_metrics.render(extra_lines=_system_metrics()),
+        media_type="text/plain; version=0.0.4",
+    )
@@ -7,8 +7,10 @@ from src.exceptions import (
     UserNotFoundHTTPException,
 )
 from src.schemas.user import UserPatch, UserIsAdminRequest
+from src.schemas.views import ListView
 from src.services.user import UserService
-from src.api.dependencies import DBDep, AdminUserDep, PaginationDep, UserDep
+from src.api.dependencies import DBDep, AdminUserDep, PaginationDep, ReadDBDep, UserDep
+from src.utils.responses import FastJSONResponse
 from src.logger import logger
 
 
@@ -18,18 +20,37 @@ router = APIRouter(prefix="/user", tags=["Пользователи"])
 @router.get(
     "/",
     summary="Возвращает список пользователей",
-    description="Получение списка всех пользователей. Только для админов",
+    description=(
+        """Получение списка всех пользователей. 
+        Ожидает вариант представления view: summary (id, имя, email и признак админа) 
+        или detail (по умолчанию). Только для админов"""
+    ),
 )
-async def get_all_users(admin_user: AdminUserDep, db: DBDep, pagination: PaginationDep):
+async def get_all_users(
+    admin_user: AdminUserDep, db: ReadDBDep, pagination: PaginationDep, view: ListView = "detail"
+):
     logger.info("Получение списка пользователей")
+    user_service = UserService(db)
     try:
-        users = await UserService(db).get_all_users()
+        users = await user_service.get_all_users(
+            limit=pagination.per_page,
+            offset=pagination.offset,
+            after_id=pagination.after_id,
+            view=view,
+        )
     except UserNotFoundException:
         logger.error("Пользователи не найдены")
         raise UserNotFoundHTTPException
-    users = users[pagination.per_page * (pagination.page - 1) :][: pagination.per_page]
-    logger.info(f"Список пользователей получен успешно. Количество пользователей: {len(users)}")
-    return {"status": "OK", "data": users}
+    total = None if pagination.is_cursor else await user_service.count_users()
+    logger.info("Список пользователей получен успешно. Количество пользователей: %s", len(users))
+    return FastJSONResponse(
+        {
+            "status": "OK",
+            "data": users,
+            "total": total,
+            "next_after_id": pagination.next_after_id(users),
+        }
+    )
 
 
 @router.put(
@@ -46,7 +67,7 @@ async def turn_user_to_admin(admin_user: AdminUserDep, db: DBDep, is_admin: User
     try:
         user = await UserService(db).turn_to_admin(is_admin=is_admin, id=id)
     except InvalidInputException:
-        logger.error(f"Ошибка обновления данных пользователя с id: {id}: неверный ввод")
+        logger.error("Ошибка обновления данных пользователя с id: %s: неверный ввод", id)
         raise InvalidInputHTTPException
     except UserNotFoundException:
         logger.error("Пользователь не найден")
@@ -65,11 +86,11 @@ async def turn_user_to_admin(admin_user: AdminUserDep, db: DBDep, is_admin: User
     ),
 )
 async def edit_reader(user: UserDep, db: DBDep, user_data: UserPatch):
-    logger.info(f"Обновление данных пользователя с id: {user.id}")
+    logger.info("Обновление данных пользователя с id: %s", user.id)
     try:
         edited_user = await UserService(db).edit_user(user_data=user_data, id=user.id)
-        logger.info(f"Данные пользователя с id: {user.id} успешно обновлены")
+        logger.info("Данные пользователя с id: %s успешно обновлены", user.id)
     except InvalidInputException:
-        logger.error(f"Ошибка обновления данных пользователя с id: {user.id}: неверный ввод")
+        logger.error("Ошибка обновления данных пользователя с id: %s: неверный ввод", user.id)
         raise InvalidInputHTTPException
     return {"status": "OK", "data": edited_user}
@@ -0,0 +1,91 @@
+"""
+Общие функции бенчмарков: клиент для приложения, замер запросов и расчет перцентилей.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from httpx import ASGITransport, AsyncClient, Response
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def report(name: str, latencies: list[float]) -> None:
+    print(
+        f"{name}: n={len(latencies)} "
+        f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p95={percentile(latencies, 95) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms"
+    )
+
+
+# Функция для создания клиента: запросы идут в запущенный сервер, если передан base_url,
+# иначе - напрямую в приложение через ASGI в том же процессе
+def make_client(base_url: str | None = None) -> AsyncClient:
+    if base_url:
+        return AsyncClient(base_url=base_url, timeout=60)
+    from src.main import app
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    duration: float = 0.0
+
+    def as_dict(self) -> dict:
+        throughput = len(self.latencies) / self.duration if self.duration else 0.0
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "duration_seconds": round(self.duration, 3),
+            "throughput_rps": round(throughput, 1),
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+        }
+
+    def print(self) -> None:
+        data = self.as_dict()
+        print(
+            f"{self.name}: n={data['requests']} errors={data['errors']} "
+            f"rps={data['throughput_rps']} p50={data['p50_ms']}ms "
+            f"p95={data['p95_ms']}ms p99={data['p99_ms']}ms"
+        )
+
+
+# Функция для выполнения count запросов, не больше concurrency одновременно.
+# request получает номер запроса. Ответ со статусом не из ok_statuses считается ошибкой
+async def run_requests(
+    name: str,
+    count: int,
+    concurrency: int,
+    request: Callable[[int], Awaitable[Response]],
+    ok_statuses: tuple[int, ...] = (200,),
+) -> ScenarioResult:
+    result = ScenarioResult(name=name)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def measure(number: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request(number)
+            result.latencies.append(time.perf_counter() - start)
+            if response.status_code not in ok_statuses:
+                result.errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[measure(number) for number in range(count)])
+    result.duration = time.perf_counter() - start
+    return result
@@ -0,0 +1,73 @@
+"""
+Бенчмарк задержки GET /books во время массового входа пользователей.
+
+Сначала измеряется задержка чтения списка книг без нагрузки, затем те же запросы
+выполняются одновременно с пачкой запросов на вход (хеширование bcrypt).
+Приложение запускается в том же процессе через ASGI, поэтому блокировка цикла событий
+сразу видна по росту p99.
+
+Запуск (нужна база с примененными миграциями, настройки берутся из .env):
+    python -m src.benchmarks.login_storm --logins 50 --reads 300
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from httpx import AsyncClient
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.benchmarks.common import make_client, report  # noqa: E402
+
+
+BENCH_USER = {"name": "bench", "email": "bench@example.com", "password": "bench"}
+
+
+async def read_books(client: AsyncClient, reads: int, concurrency: int) -> list[float]:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def read() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get("/books")
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    await asyncio.gather(*[read() for _ in range(reads)])
+    return latencies
+
+
+async def login_storm(client: AsyncClient, logins: int) -> None:
+    credentials = {"email": BENCH_USER["email"], "password": BENCH_USER["password"]}
+    await asyncio.gather(*[client.post("/auth/login", json=credentials) for _ in range(logins)])
+
+
+async def main(logins: int, reads: int, concurrency: int) -> None:
+    async with make_client() as client:
+        # Пользователь может уже существовать после предыдущего запуска
+        await client.post("/auth/register", json=BENCH_USER)
+        response = await client.post(
+            "/auth/login",
+            json={"email": BENCH_USER["email"], "password": BENCH_USER["password"]},
+        )
+        response.raise_for_status()
+
+        report("GET /books", await read_books(client, reads, concurrency))
+
+        storm = asyncio.create_task(login_storm(client, logins))
+        latencies = await read_books(client, reads, concurrency)
+        await storm
+        report(f"GET /books + {logins} logins", latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(logins=args.logins, reads=args.reads, concurrency=args.concurrency))
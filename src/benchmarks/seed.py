@@ -0,0 +1,163 @@
+"""
+Генератор тестовых данных для бенчмарков.
+
+Данные генерируются детерминированно по seed: одинаковые параметры на пустой базе дают
+одинаковые данные, поэтому результаты бенчмарков можно сравнивать между коммитами.
+У всех пользователей пароль BENCH_PASSWORD и email вида bench_user_<номер>@example.com.
+Около OPEN_BORROWS_SHARE займов не завершены, счетчики взятых книг у пользователей
+и доступных экземпляров у книг согласованы с ними.
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from src.schemas.author import AuthorAdd
+from src.schemas.book import BookAdd, BooksAuthorsAdd
+from src.schemas.borrow import BorrowAdd
+from src.schemas.user import UserAdd
+from src.services.auth import AuthService
+from src.services.borrow import MAX_BORROWED_BOOKS
+from src.utils.db_manager import DBManager
+
+
+BENCH_PASSWORD = "bench"
+OPEN_BORROWS_SHARE = 0.1
+
+WORDS = (
+    "война мир сад море город ночь дорога время память дом "
+    "река огонь звезда ветер тайна сердце лес остров письмо сон "
+    "история путь свет тень зима лето песня камень небо берег"
+).split()
+GENRES = ["Роман", "Повесть", "Поэзия", "Драма", "Детектив", "Фантастика", "Биография", "Очерк"]
+
+
+@dataclass
+class SeedParams:
+    books: int = 1000
+    authors: int = 200
+    users: int = 200
+    borrows: int = 2000
+    seed: int = 42
+
+
+def bench_user_email(number: int) -> str:
+    return f"bench_user_{number}@example.com"
+
+
+def _words(rng: random.Random, min_count: int, max_count: int) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(min_count, max_count)))
+
+
+def _random_date(rng: random.Random, start: date, end: date) -> date:
+    return start + timedelta(days=rng.randint(0, (end - start).days))
+
+
+# Функция для удаления всех данных из таблиц приложения и сброса счетчиков id
+async def reset_database(db: DBManager) -> None:
+    await db.session.execute(
+        text("TRUNCATE borrows, books_authors, books, authors, users RESTART IDENTITY CASCADE")
+    )
+    await db.commit()
+
+
+# Функция для заполнения базы тестовыми данными. Возвращает количество добавленных строк
+async def seed_database(db: DBManager, params: SeedParams) -> dict[str, int]:
+    rng = random.Random(params.seed)
+    today = date.today()
+
+    authors = await db.author.add_many(
+        [
+            AuthorAdd(
+                name=f"Автор {number}",
+                biography=_words(rng, 10, 30),
+                birth_date=_random_date(rng, date(1750, 1, 1), date(1990, 1, 1)),
+            )
+            for number in range(params.authors)
+        ]
+    )
+    copies = [rng.randint(1, 10) for _ in range(params.books)]
+    books = await db.book.add_many(
+        [
+            BookAdd(
+                title=_words(rng, 2, 4).capitalize(),
+                description=_words(rng, 8, 30),
+                date_of_publication=_random_date(rng, date(1800, 1, 1), today),
+                genre=rng.choice(GENRES),
+                available_copies=copies[number],
+            )
+            for number in range(params.books)
+        ]
+    )
+    books_authors = [
+        BooksAuthorsAdd(book_id=book.id, author_id=author.id)
+        for book in books
+        for author in rng.sample(authors, k=min(len(authors), rng.randint(1, 3)))
+    ]
+    await db.books_authors.add_many(books_authors)
+
+    # Хеш пароля одинаковый у всех пользователей, чтобы не вычислять bcrypt для каждого
+    hashed_password = AuthService().hash_password(BENCH_PASSWORD)
+    users = await db.user.add_many(
+        [
+            UserAdd(
+                name=f"Читатель {number}",
+                email=bench_user_email(number),
+                hashed_password=hashed_password,
+            )
+            for number in range(params.users)
+        ]
+    )
+
+    # Незавершенные займы не превышают количество экземпляров книги, а у читателя
+    # остается место для еще одной книги, чтобы любой читатель мог участвовать в сценарии выдачи
+    open_by_user = [0] * len(users)
+    open_by_book = [0] * len(books)
+    borrows = []
+    for _ in range(params.borrows if books and users else 0):
+        user_index = rng.randrange(len(users))
+        book_index = rng.randrange(len(books))
+        borrow_date = _random_date(rng, today - timedelta(days=730), today)
+        is_returned = not (
+            rng.random() < OPEN_BORROWS_SHARE
+            and open_by_user[user_index] < MAX_BORROWED_BOOKS - 1
+            and open_by_book[book_index] < copies[book_index]
+        )
+        if not is_returned:
+            open_by_user[user_index] += 1
+            open_by_book[book_index] += 1
+        borrows.append(
+            BorrowAdd(
+                reader_id=users[user_index].id,
+                book_id=books[book_index].id,
+                borrow_date=borrow_date,
+                return_date=borrow_date + timedelta(days=rng.randint(14, 60)),
+                is_returned=is_returned,
+            )
+        )
+    await db.borrow.add_many(borrows)
+
+    await db.session.execute(
+        text(
+            "UPDATE users SET borrowed_books = opened.count FROM ("
+            "SELECT reader_id, count(*) AS count FROM borrows WHERE NOT is_returned "
+            "GROUP BY reader_id) AS opened WHERE users.id = opened.reader_id"
+        )
+    )
+    await db.session.execute(
+        text(
+            "UPDATE books SET available_copies = available_copies - opened.count FROM ("
+            "SELECT book_id, count(*) AS count FROM borrows WHERE NOT is_returned "
+            "GROUP BY book_id) AS opened WHERE books.id = opened.book_id"
+        )
+    )
+    await db.commit()
+    return {
+        "authors": len(authors),
+        "books": len(books),
+        "books_authors": len(books_authors),
+        "users": len(users),
+        "borrows": len(borrows),
+    }
@@ -0,0 +1,119 @@
+"""
+Бенчмарк преобразования строк таблицы пользователей в JSON-ответ.
+
+Сравниваются два пути:
+    before - ORM объекты целиком, model_validate для каждой строки, повторная валидация
+             в UserResponse, jsonable_encoder и json.dumps (как было в UserService и роутерах);
+    after  - только нужные столбцы (Row), валидация списка одним TypeAdapter
+             и сериализация pydantic_core (FastJSONResponse).
+Для каждого этапа (чтение из базы, валидация, сериализация) выводится количество строк в секунду.
+
+Тестовые пользователи добавляются в транзакции, которая в конце откатывается.
+Запуск (нужна база с примененными миграциями, настройки берутся из .env):
+    python -m src.benchmarks.serialization --rows 100000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, text
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.CRUD.base import list_adapter  # noqa: E402
+from src.database import async_session_maker  # noqa: E402
+from src.models.user import UsersORM  # noqa: E402
+from src.schemas.user import User, UserResponse  # noqa: E402
+from src.utils.responses import FastJSONResponse  # noqa: E402
+
+
+async def fetch_before(session, rows: int) -> list:
+    result = await session.execute(select(UsersORM).order_by(UsersORM.id).limit(rows))
+    return result.scalars().all()
+
+
+def validate_before(rows: list) -> list[UserResponse]:
+    users = [User.model_validate(row, from_attributes=True) for row in rows]
+    return [UserResponse(**user.model_dump()) for user in users]
+
+
+def serialize_before(users: list[UserResponse]) -> bytes:
+    return JSONResponse(content=jsonable_encoder({"status": "OK", "data": users})).body
+
+
+async def fetch_after(session, rows: int) -> list:
+    columns = [getattr(UsersORM, name) for name in UserResponse.model_fields]
+    result = await session.execute(select(*columns).order_by(UsersORM.id).limit(rows))
+    return result.all()
+
+
+def validate_after(rows: list) -> list[UserResponse]:
+    return list_adapter(UserResponse).validate_python(rows, from_attributes=True)
+
+
+def serialize_after(users: list[UserResponse]) -> bytes:
+    return FastJSONResponse(content={"status": "OK", "data": users}).body
+
+
+async def measure(call: Callable[[], Awaitable[Any] | Any]) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = call()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result, time.perf_counter() - start
+
+
+async def run_path(session, name: str, fetch, validate, serialize, rows: int, repeat: int) -> bytes:
+    timings = {"fetch": [], "validate": [], "serialize": []}
+    body = b""
+    for _ in range(repeat):
+        # ORM объекты не должны браться из identity map предыдущего прогона
+        session.expunge_all()
+        fetched, elapsed = await measure(lambda: fetch(session, rows))
+        timings["fetch"].append(elapsed)
+        users, elapsed = await measure(lambda: validate(fetched))
+        timings["validate"].append(elapsed)
+        body, elapsed = await measure(lambda: serialize(users))
+        timings["serialize"].append(elapsed)
+
+    # Берется лучший прогон каждого этапа, чтобы уменьшить влияние шума
+    best = {stage: min(values) for stage, values in timings.items()}
+    stages = " ".join(f"{stage}={rows / seconds:,.0f}" for stage, seconds in best.items())
+    print(f"{name}: total={rows / sum(best.values()):,.0f} rows/s ({stages})")
+    return body
+
+
+async def main(rows: int, repeat: int) -> None:
+    async with async_session_maker() as session:
+        await session.execute(
+            text(
+                "INSERT INTO users (name, email, hashed_password) "
+                "SELECT 'bench_' || g, 'serialization_bench_' || g || '@example.com', "
+                "repeat('x', 60) FROM generate_series(1, :rows) AS g"
+            ),
+            {"rows": rows},
+        )
+        try:
+            before = await run_path(
+                session, "before", fetch_before, validate_before, serialize_before, rows, repeat
+            )
+            after = await run_path(
+                session, "after", fetch_after, validate_after, serialize_after, rows, repeat
+            )
+            assert before == after, "Ответы должны совпадать"
+        finally:
+            await session.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(rows=args.rows, repeat=args.repeat))
@@ -0,0 +1,252 @@
+"""
+Набор бенчмарков API: заполнение базы и сценарии нагрузки.
+
+Сценарии:
+    browse - просмотр каталога: страницы списка книг, отдельные книги и поиск;
+    login  - массовый вход разных пользователей (хеширование bcrypt);
+    borrow - конкурентная выдача и возврат нескольких популярных книг.
+Для каждого сценария выводятся количество запросов, ошибки, пропускная способность
+и p50/p95/p99. Результаты можно сохранить в JSON (--output) и сравнить
+с результатами другого коммита (--compare).
+
+Запросы идут напрямую в приложение через ASGI или в запущенный сервер (--base-url).
+Настройки базы берутся из .env. Кэш каталога можно отключить переменной BOOK_CACHE_TTL=0.
+
+Запуск:
+    python -m src.benchmarks.suite seed --reset --books 10000 --users 500 --borrows 20000
+    python -m src.benchmarks.suite run --output before.json
+    python -m src.benchmarks.suite run --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from httpx import AsyncClient
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.benchmarks.common import ScenarioResult, make_client, run_requests  # noqa: E402
+from src.benchmarks.seed import (  # noqa: E402
+    BENCH_PASSWORD,
+    WORDS,
+    SeedParams,
+    bench_user_email,
+    reset_database,
+    seed_database,
+)
+from src.config import settings  # noqa: E402
+from src.database import async_session_maker  # noqa: E402
+from src.utils.db_manager import DBManager  # noqa: E402
+
+
+SCENARIOS = ("browse", "login", "borrow")
+# Показатели, которые сравниваются между запусками
+COMPARED_METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+async def login(client: AsyncClient, number: int) -> None:
+    response = await client.post(
+        "/auth/login", json={"email": bench_user_email(number), "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+
+
+async def browse(args: argparse.Namespace, rng: random.Random) -> list[ScenarioResult]:
+    async with make_client(args.base_url) as client:
+        await login(client, 0)
+        response = await client.get("/books", params={"per_page": 10})
+        response.raise_for_status()
+        total_books = response.json()["total"]
+        pages = max(1, total_books // 10)
+
+        # Параметры запросов выбираются заранее, чтобы они не зависели от порядка ответов
+        pages_params = [rng.randint(1, pages) for _ in range(args.requests)]
+        book_ids = [rng.randint(1, total_books) for _ in range(args.requests)]
+        queries = [rng.choice(WORDS) for _ in range(args.requests)]
+        return [
+            await run_requests(
+                "browse: GET /books",
+                args.requests,
+                args.concurrency,
+                lambda n: client.get("/books", params={"page": pages_params[n], "per_page": 10}),
+            ),
+            await run_requests(
+                "browse: GET /books/{id}",
+                args.requests,
+                args.concurrency,
+                lambda n: client.get(f"/books/{book_ids[n]}"),
+            ),
+            await run_requests(
+                "browse: GET /books/search",
+                args.requests,
+                args.concurrency,
+                lambda n: client.get("/books/search", params={"q": queries[n], "per_page": 10}),
+            ),
+        ]
+
+
+async def login_storm(args: argparse.Namespace, rng: random.Random) -> list[ScenarioResult]:
+    async with make_client(args.base_url) as client:
+        return [
+            await run_requests(
+                "login: POST /auth/login",
+                args.logins,
+                args.concurrency,
+                lambda n: client.post(
+                    "/auth/login",
+                    json={"email": bench_user_email(n % args.users), "password": BENCH_PASSWORD},
+                ),
+            )
+        ]
+
+
+# Каждый читатель несколько раз пытается взять одну из популярных книг и сразу возвращает ее.
+# Отказ из-за отсутствия свободных экземпляров (404) - ожидаемый результат, а не ошибка
+async def borrow_contention(args: argparse.Namespace, rng: random.Random) -> list[ScenarioResult]:
+    borrow_result = ScenarioResult(name="borrow: POST /borrows")
+    return_result = ScenarioResult(name="borrow: PATCH /borrows/{id}/return")
+    today = date.today()
+    borrow_data = {
+        "borrow_date": today.isoformat(),
+        "return_date": (today + timedelta(days=14)).isoformat(),
+    }
+    return_date = (today + timedelta(days=1)).isoformat()
+    book_choices = [
+        [rng.randint(1, args.hot_books) for _ in range(args.rounds)] for _ in range(args.borrowers)
+    ]
+
+    async def reader(number: int, client: AsyncClient) -> None:
+        for book_id in book_choices[number]:
+            start = time.perf_counter()
+            response = await client.post("/borrows", json={"book_id": book_id, **borrow_data})
+            borrow_result.latencies.append(time.perf_counter() - start)
+            if response.status_code not in (200, 404):
+                borrow_result.errors += 1
+            if response.status_code != 200:
+                continue
+
+            borrow_id = response.json()["data"]["id"]
+            start = time.perf_counter()
+            response = await client.patch(
+                f"/borrows/{borrow_id}/return", params={"return_date": return_date}
+            )
+            return_result.latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                return_result.errors += 1
+
+    # У каждого читателя свой клиент, так как токен хранится в cookie
+    clients = [make_client(args.base_url) for _ in range(args.borrowers)]
+    try:
+        for number, client in enumerate(clients):
+            await login(client, number % args.users)
+        start = time.perf_counter()
+        await asyncio.gather(*[reader(number, client) for number, client in enumerate(clients)])
+        borrow_result.duration = return_result.duration = time.perf_counter() - start
+    finally:
+        for client in clients:
+            await client.aclose()
+    return [borrow_result, return_result]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    print(f"\nСравнение с {baseline_path} (коммит {baseline.get('commit')}):")
+    for name, metrics in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            before, after = old[metric], metrics[metric]
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            changes.append(f"{metric} {before} -> {after} ({change})")
+        print(f"{name}: " + ", ".join(changes))
+
+
+async def run(args: argparse.Namespace) -> None:
+    scenarios = {"browse": browse, "login": login_storm, "borrow": borrow_contention}
+    rng = random.Random(args.seed)
+    results = {}
+    for name in args.scenarios:
+        for result in await scenarios[name](args, rng):
+            result.print()
+            results[result.name] = result.as_dict()
+
+    if args.output:
+        data = {
+            "commit": git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": {key: value for key, value in vars(args).items() if key != "command"},
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(data, ensure_ascii=False, indent=2), "utf-8")
+        print(f"Результаты сохранены в {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+async def seed(args: argparse.Namespace) -> None:
+    if settings.MODE == "PROD":
+        raise SystemExit("Заполнение тестовыми данными недоступно в режиме PROD")
+    params = SeedParams(
+        books=args.books,
+        authors=args.authors,
+        users=args.users,
+        borrows=args.borrows,
+        seed=args.seed,
+    )
+    async with DBManager(session_factory=async_session_maker) as db:
+        if args.reset:
+            await reset_database(db)
+        counts = await seed_database(db, params)
+    print("Добавлено: " + ", ".join(f"{table}={count}" for table, count in counts.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="заполнить базу тестовыми данными")
+    seed_parser.add_argument(
+        "--reset", action="store_true", help="удалить все данные перед заполнением"
+    )
+    seed_parser.add_argument("--books", type=int, default=SeedParams.books)
+    seed_parser.add_argument("--authors", type=int, default=SeedParams.authors)
+    seed_parser.add_argument("--users", type=int, default=SeedParams.users)
+    seed_parser.add_argument("--borrows", type=int, default=SeedParams.borrows)
+    seed_parser.add_argument("--seed", type=int, default=SeedParams.seed)
+
+    run_parser = commands.add_parser("run", help="запустить сценарии нагрузки")
+    run_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run_parser.add_argument("--base-url", help="адрес запущенного сервера вместо ASGI")
+    run_parser.add_argument("--requests", type=int, default=500, help="запросов на сценарий browse")
+    run_parser.add_argument("--concurrency", type=int, default=20)
+    run_parser.add_argument("--logins", type=int, default=100)
+    run_parser.add_argument(
+        "--users", type=int, default=SeedParams.users, help="количество заполненных пользователей"
+    )
+    run_parser.add_argument("--borrowers", type=int, default=20)
+    run_parser.add_argument("--rounds", type=int, default=5)
+    run_parser.add_argument("--hot-books", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=SeedParams.seed)
+    run_parser.add_argument("--output", help="файл для сохранения результатов в JSON")
+    run_parser.add_argument("--compare", help="файл с результатами для сравнения")
+
+    args = parser.parse_args()
+    asyncio.run(seed(args) if args.command == "seed" else run(args))
@@ -4,7 +4,9 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    MODE: Literal["TEST", "LOCAL"]
+    # TEST - тесты, LOCAL - разработка (один процесс с перезагрузкой при изменении кода),
+    # PROD - несколько воркеров без перезагрузки
+    MODE: Literal["TEST", "LOCAL", "PROD"]
 
     DB_NAME: str
     DB_HOST: str
@@ -12,12 +14,63 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
 
+    # Настройки пула соединений (в тестовом режиме пул не используется)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Порог времени получения соединения из пула, после которого пишется предупреждение в лог
+    DB_POOL_SLOW_ACQUIRE_SECONDS: float = 1.0
+
+    # Адреса реплик только для чтения (postgresql+asyncpg://...), JSON-список.
+    # Если список пуст, все запросы идут в основную базу. Реплика, к которой не удалось
+    # подключиться, не используется DB_REPLICA_RETRY_SECONDS секунд
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_RETRY_SECONDS: float = 30
+
     @property
     def DB_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_MAXSIZE: int = 10000
+
+    # Кэш пользователей для аутентификации. Кэш локальный для процесса, поэтому при
+    # нескольких воркерах изменения пользователя видны в других воркерах не позже чем через TTL
+    USER_CACHE_TTL: int = 30
+    USER_CACHE_MAXSIZE: int = 1024
+
+    # Кэш каталога книг. memory - кэш в памяти процесса, redis - общий кэш воркеров
+    # во внешнем хранилище с протоколом Redis (нужен пакет redis)
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    BOOK_CACHE_TTL: int = 60
+    BOOK_CACHE_MAXSIZE: int = 1024
+
+    # Количество потоков для хеширования и проверки паролей
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Количество строк, которые записываются в базу одной транзакцией при массовом импорте
+    IMPORT_CHUNK_SIZE: int = 500
+    # Количество строк, которые читаются из базы за раз при потоковой выгрузке
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Настройки сервера. Количество воркеров, keep-alive, очередь входящих соединений
+    # и время на завершение обработки запросов при остановке используются в режиме PROD
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 4
+    SERVER_KEEP_ALIVE: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+
+    # Уровень логирования и формат вывода: text - строки для чтения, json - одна запись JSON
+    # на строку для сборщиков логов
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    LOG_FORMAT: Literal["text", "json"] = "text"
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,21 +1,240 @@
-from sqlalchemy import NullPool
+import asyncio
+import time
+
+from sqlalchemy import AsyncAdaptedQueuePool, NullPool, QueuePool, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 
 from src.config import settings
+from src.logger import logger
+from src.utils.metrics import instrument_engine
+
+
+class PoolStats:
+    """
+    Статистика получения соединений из пула: сколько раз соединение запрашивалось,
+    суммарное и максимальное время ожидания, количество неудачных попыток (например, по таймауту)
+    """
+
+    def __init__(self):
+        self.acquired = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, failed: bool = False) -> None:
+        if failed:
+            self.failed += 1
+        else:
+            self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if wait >= settings.DB_POOL_SLOW_ACQUIRE_SECONDS:
+            logger.warning("Долгое ожидание соединения из пула: %.3f с", wait)
+
+    def as_dict(self) -> dict:
+        requests = self.acquired + self.failed
+        return {
+            "acquired": self.acquired,
+            "failed": self.failed,
+            "total_wait_seconds": round(self.total_wait, 6),
+            "avg_wait_seconds": round(self.total_wait / requests, 6) if requests else 0.0,
+            "max_wait_seconds": round(self.max_wait, 6),
+        }
+
+
+pool_stats = PoolStats()
+
+
+# Примесь к классу пула, которая замеряет время получения соединения
+# (ожидание свободного соединения, создание нового и pre-ping)
+class _MeasuredPoolMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except Exception:
+            pool_stats.record(time.perf_counter() - start, failed=True)
+            raise
+        pool_stats.record(time.perf_counter() - start)
+        return connection
 
 
-db_params = {}
+class MeasuredQueuePool(_MeasuredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class MeasuredNullPool(_MeasuredPoolMixin, NullPool):
+    pass
+
+
+db_params = {
+    "poolclass": MeasuredQueuePool,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
 # Если приложение работает в тестовом режиме, используем подключение с NullPool,
 # то есть каждый раз будет создаваться новое соединение с базой для избежания
 # проблем с состоянием
 if settings.MODE == "TEST":
-    db_params = {"poolclass": NullPool}
+    db_params = {"poolclass": MeasuredNullPool}
 
 engine = create_async_engine(settings.DB_URL, **db_params)
+instrument_engine(engine)
 
 async_session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 
+# Реплики используют обычный пул без замеров, чтобы статистика pool_stats
+# (GET /system/pool и db_pool_* в /metrics) относилась только к основной базе
+replica_db_params = {
+    **db_params,
+    "poolclass": NullPool if settings.MODE == "TEST" else AsyncAdaptedQueuePool,
+}
+
+
+class ReplicaSession(Session):
+    """
+    Сессия для чтения с реплик. Реплика выбирается при первом запросе к базе, а не при
+    создании сессии: если к реплике не удалось подключиться, пробуется следующая,
+    а если доступных реплик нет, запросы идут в основную базу (fallback_bind)
+    """
+
+    def __init__(self, *args, router: "ReplicaRouter", fallback_bind, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._router = router
+        self._fallback_bind = fallback_bind
+        self._chosen_bind = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._chosen_bind is None:
+            self._chosen_bind = self._choose_bind()
+        return self._chosen_bind
+
+    # Метод для выбора реплики. Соединение с репликой открывается сразу,
+    # чтобы при ошибке подключения перейти к следующей
+    def _choose_bind(self):
+        for index in self._router.candidates():
+            bind = self._router.engines[index].sync_engine
+            try:
+                self.connection(bind_arguments={"bind": bind})
+            except (OSError, SQLAlchemyError, asyncio.TimeoutError):
+                self._router.mark_failed(index)
+                continue
+            self._router.mark_used(index)
+            return bind
+        return self._fallback_bind
+
+
+class ReplicaRouter:
+    """
+    Выбирает реплику для чтения по кругу. Реплика, к которой не удалось подключиться,
+    пропускается retry_after секунд, после чего снова участвует в выборе
+    """
+
+    def __init__(self, urls: list[str], retry_after: float):
+        self.engines = []
+        for url in urls:
+            replica_engine = create_async_engine(url, **replica_db_params)
+            instrument_engine(replica_engine)
+            self.engines.append(replica_engine)
+        self.session_maker = async_sessionmaker(
+            expire_on_commit=False,
+            sync_session_class=ReplicaSession,
+            router=self,
+            fallback_bind=engine.sync_engine,
+        )
+        self.retry_after = retry_after
+        self._next = 0
+        self._failed_until = [0.0] * len(self.engines)
+        self.sessions = [0] * len(self.engines)
+        self.failures = [0] * len(self.engines)
+
+    # Метод для получения номеров доступных реплик в порядке, в котором их нужно пробовать
+    def candidates(self) -> list[int]:
+        count = len(self.engines)
+        if not count:
+            return []
+        start = self._next
+        self._next = (self._next + 1) % count
+        now = time.monotonic()
+        order = ((start + shift) % count for shift in range(count))
+        return [index for index in order if self._failed_until[index] <= now]
+
+    def mark_used(self, index: int) -> None:
+        self.sessions[index] += 1
+
+    def mark_failed(self, index: int) -> None:
+        self.failures[index] += 1
+        self._failed_until[index] = time.monotonic() + self.retry_after
+        logger.warning(
+            "Реплика %s недоступна, не используется %s с",
+            self.engines[index].url.render_as_string(hide_password=True),
+            self.retry_after,
+        )
+
+    def status(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "url": replica_engine.url.render_as_string(hide_password=True),
+                "available": self._failed_until[index] <= now,
+                "sessions": self.sessions[index],
+                "failures": self.failures[index],
+            }
+            for index, replica_engine in enumerate(self.engines)
+        ]
+
+    async def dispose(self) -> None:
+        for replica_engine in self.engines:
+            await replica_engine.dispose()
+
+
+replica_router = ReplicaRouter(
+    urls=settings.DB_REPLICA_URLS, retry_after=settings.DB_REPLICA_RETRY_SECONDS
+)
+
+
+# Функция для получения текущего состояния пула соединений
+def get_pool_status() -> dict:
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__, **pool_stats.as_dict()}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # Пока пул не заполнен, SQLAlchemy возвращает отрицательное значение
+            overflow=max(pool.overflow(), 0),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    if replica_router.engines:
+        status["replicas"] = replica_router.status()
+    return status
+
+
+# Функция для прогрева пула: открывает сразу DB_POOL_SIZE соединений, чтобы первые запросы
+# после запуска воркера не ждали установки соединений. Ошибка прогрева не мешает запуску,
+# соединения тогда будут открыты при первых запросах
+async def warm_up_pool() -> None:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+
+    async def ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.gather(*[ping() for _ in range(pool.size())])
+        logger.info("Пул соединений прогрет: %s соединений", pool.checkedin())
+    except Exception:
+        logger.exception("Ошибка прогрева пула соединений")
+
+
 class Base(DeclarativeBase):
     pass
@@ -1,12 +1,82 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from src.config import settings
+
+
+# Id текущего запроса, устанавливается RequestIdMiddleware и попадает в каждую запись лога
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+# Фильтр, который добавляет в запись id запроса. Выполняется в потоке, который пишет лог,
+# поэтому id берется из контекста запроса, а не из потока QueueListener
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись лога в одну строку JSON: время, уровень, логгер, id запроса,
+    сообщение и, если есть, текст исключения
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Кладет записи в очередь без форматирования. Стандартный QueueHandler форматирует
+    запись (вместе с трассировкой исключения) в потоке, который пишет лог, и удаляет
+    exc_info. Здесь в записи подставляется только текст сообщения, а форматирование
+    и трассировка выполняются в потоке QueueListener выбранным форматтером
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Аргументы подставляются сразу, потому что к моменту вывода они могут измениться
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 logger = logging.getLogger("my_logger")
-logger.setLevel(logging.DEBUG)
+logger.setLevel(settings.LOG_LEVEL)
 
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+if settings.LOG_FORMAT == "json":
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(request_id)s - %(message)s")
 
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
 
-logger.addHandler(console_handler)
+# Запись в stderr выполняется в отдельном потоке QueueListener: обработчик запросов
+# только кладет запись в очередь и не блокируется на выводе
+log_queue = queue.SimpleQueue()
+queue_handler = LogQueueHandler(log_queue)
+queue_handler.addFilter(RequestIdFilter())
+logger.addHandler(queue_handler)
+
+queue_listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+queue_listener.start()
+# Оставшиеся в очереди записи выводятся при завершении процесса
+atexit.register(queue_listener.stop)
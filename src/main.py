@@ -1,4 +1,5 @@
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -11,17 +12,51 @@ from src.api.auth import router as router_auth
 from src.api.user import router as router_user
 from src.api.book import router as router_book
 from src.api.borrow import router as router_borrow
+from src.api.system import metrics_router, router as router_system
+from src.config import settings
+from src.database import engine, replica_router, warm_up_pool
 from src.logger import logger
+from src.middlewares import MetricsMiddleware, RequestIdMiddleware
 
 
-app = FastAPI()
+# Запуск и остановка воркера: при запуске прогревается пул соединений,
+# при остановке (после завершения текущих запросов) соединения закрываются
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pool()
+    yield
+    logger.info("Закрытие соединений с базой данных")
+    await engine.dispose()
+    await replica_router.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(router_auth)
 app.include_router(router_user)
 app.include_router(router_author)
 app.include_router(router_book)
 app.include_router(router_borrow)
+app.include_router(router_system)
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
-    logger.info("Запуск приложения через uvicorn")
-    uvicorn.run("main:app", host="0.0.0.0", reload=True)
+    if settings.MODE == "PROD":
+        logger.info("Запуск приложения через uvicorn, воркеров: %s", settings.SERVER_WORKERS)
+        # loop и http "auto" выбирают uvloop и httptools, если они установлены
+        uvicorn.run(
+            "main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=settings.SERVER_WORKERS,
+            loop="auto",
+            http="auto",
+            backlog=settings.SERVER_BACKLOG,
+            timeout_keep_alive=settings.SERVER_KEEP_ALIVE,
+            timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+        )
+    else:
+        logger.info("Запуск приложения через uvicorn")
+        uvicorn.run("main:app", host=settings.SERVER_HOST, port=settings.SERVER_PORT, reload=True)
@@ -0,0 +1,89 @@
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.logger import request_id_var
+from src.utils.metrics import QueryStats, query_stats_var, request_metrics
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+class RequestIdMiddleware:
+    """
+    Присваивает каждому запросу id: берет его из заголовка X-Request-ID или создает новый.
+    Id сохраняется в request_id_var (попадает в записи лога) и возвращается
+    в заголовке ответа. Реализован как ASGI middleware, чтобы не создавать
+    дополнительных задач на каждый запрос
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(REQUEST_ID_HEADER.lower().encode(), b"").decode("latin-1")
+        request_id = request_id[:128] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    Замеряет время обработки запроса, количество и время запросов к базе и записывает их
+    в метрики маршрута (шаблон пути, например /books/{id}). Время работы приложения и базы
+    к моменту начала ответа возвращается в заголовке Server-Timing
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        queries = QueryStats()
+        token = query_stats_var.set(queries)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = (time.perf_counter() - started_at) * 1000
+                MutableHeaders(scope=message)["Server-Timing"] = (
+                    f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries", '
+                    f"app;dur={elapsed:.1f}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats_var.reset(token)
+            # Шаблон пути вместо самого пути, чтобы количество рядов метрик не росло с id
+            route = scope.get("route")
+            request_metrics.observe(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+                duration=time.perf_counter() - started_at,
+                queries=queries,
+            )
@@ -1,7 +1,8 @@
 from datetime import date
 import typing
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import Computed, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database import Base
@@ -10,15 +11,27 @@ if typing.TYPE_CHECKING:
     from src.models.author import AuthorsORM
 
 
+# Конфигурация полнотекстового поиска PostgreSQL для названий и описаний книг
+SEARCH_CONFIG = "russian"
+
+
 class BooksORM(Base):
     __tablename__ = "books"
+    __table_args__ = (Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    title: Mapped[str] = mapped_column(String(100))
+    title: Mapped[str] = mapped_column(String(100), index=True)
     description: Mapped[str] = mapped_column(String(300))
     date_of_publication: Mapped[date]
-    genre: Mapped[str] = mapped_column(String(50))
+    genre: Mapped[str] = mapped_column(String(50), index=True)
     available_copies: Mapped[int]
+    # Поисковый вектор по названию и описанию, вычисляется базой данных.
+    # Загружается только явно, чтобы не читать его в обычных запросах книг
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', title || ' ' || description)", persisted=True),
+        deferred=True,
+    )
 
     authors: Mapped[list["AuthorsORM"]] = relationship(
         back_populates="books", secondary="books_authors"
@@ -27,7 +40,12 @@ class BooksORM(Base):
 
 class BooksAuthorsORM(Base):
     __tablename__ = "books_authors"
+    # Уникальный индекс по (book_id, author_id) запрещает дубли связей и используется
+    # для поиска по book_id, поэтому отдельный индекс по book_id не нужен
+    __table_args__ = (
+        UniqueConstraint("book_id", "author_id", name="uq_books_authors_book_id_author_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"))
-    author_id: Mapped[int] = mapped_column(ForeignKey("authors.id", ondelete="CASCADE"))
+    author_id: Mapped[int] = mapped_column(ForeignKey("authors.id", ondelete="CASCADE"), index=True)
@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import ForeignKey, text
+from sqlalchemy import ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database import Base
@@ -8,10 +8,25 @@ from src.database import Base
 
 class BorrowsORM(Base):
     __tablename__ = "borrows"
+    # Частичные индексы только по незавершенным займам: их намного меньше, чем всех займов.
+    # По дате возврата ищутся и считаются просроченные займы, по id просроченные займы
+    # выдаются страницами в порядке id
+    __table_args__ = (
+        Index(
+            "ix_borrows_open_return_date",
+            "return_date",
+            postgresql_where=text("is_returned = false"),
+        ),
+        Index(
+            "ix_borrows_open_id",
+            "id",
+            postgresql_where=text("is_returned = false"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"))
-    reader_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), index=True)
+    reader_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
     borrow_date: Mapped[date]
     return_date: Mapped[date]
     is_returned: Mapped[bool] = mapped_column(server_default=text("false"))
@@ -1,19 +1,26 @@
 from datetime import date
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
+# Ограничения длины строк совпадают с размерами столбцов таблицы authors
 class AuthorAdd(BaseModel):
-    name: str
-    biography: str
+    name: str = Field(max_length=50)
+    biography: str = Field(max_length=300)
     birth_date: date
 
 
 class AuthorPatch(BaseModel):
-    name: str | None = None
-    biography: str | None = None
+    name: str | None = Field(default=None, max_length=50)
+    biography: str | None = Field(default=None, max_length=300)
     birth_date: date | None = None
 
 
 class Author(AuthorAdd):
     id: int
+
+
+# Краткие данные автора для списков
+class AuthorSummary(BaseModel):
+    id: int
+    name: str
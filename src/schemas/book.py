@@ -1,25 +1,26 @@
 from datetime import date
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from src.schemas.author import Author
+from src.schemas.author import Author, AuthorSummary
 
 
+# Ограничения длины строк совпадают с размерами столбцов таблицы books
 class BookAddRequest(BaseModel):
-    title: str
-    description: str
+    title: str = Field(max_length=100)
+    description: str = Field(max_length=300)
     date_of_publication: date
     author_ids: list[int] = []
-    genre: str
+    genre: str = Field(max_length=50)
     available_copies: int
 
 
 class BookPatchRequest(BaseModel):
-    title: str | None = None
-    description: str | None = None
+    title: str | None = Field(default=None, max_length=100)
+    description: str | None = Field(default=None, max_length=300)
     date_of_publication: date | None = None
     author_ids: list[int] | None = None
-    genre: str | None = None
+    genre: str | None = Field(default=None, max_length=50)
     available_copies: int | None = None
 
 
@@ -47,6 +48,41 @@ class BookWithRels(Book):
     authors: list[Author]
 
 
+# Краткие данные книги для списков: без описания, авторы только с id и именем
+class BookSummary(BaseModel):
+    id: int
+    title: str
+    date_of_publication: date
+    genre: str
+    available_copies: int
+
+
+class BookSummaryWithRels(BookSummary):
+    authors: list[AuthorSummary]
+
+
+# Максимальное количество книг в одном запросе наличия экземпляров
+MAX_AVAILABILITY_IDS = 500
+
+
+class BookAvailabilityRequest(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_AVAILABILITY_IDS)
+
+
+class BookAvailability(BaseModel):
+    id: int
+    available_copies: int
+
+
+class BookSearchParams(BaseModel):
+    q: str | None = None
+    genre: str | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    author_id: int | None = None
+    available_only: bool = False
+
+
 class BooksAuthorsAdd(BaseModel):
     book_id: int
     author_id: int
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import Literal
 
 from pydantic import BaseModel
 
@@ -19,3 +20,39 @@ class BorrowAddRequest(BaseModel):
 
 class Borrow(BorrowAdd):
     id: int
+
+
+class BorrowWithBook(Borrow):
+    book_title: str
+
+
+# Фильтры займов читателя: open - незавершенные, closed - завершенные.
+# Диапазон дат относится к дате займа, order - порядок по id (порядку выдачи)
+class ReaderBorrowsParams(BaseModel):
+    status: Literal["all", "open", "closed"] = "all"
+    date_from: date | None = None
+    date_to: date | None = None
+    order: Literal["asc", "desc"] = "desc"
+    with_titles: bool = False
+
+
+# Просроченный займ: не возвращен, и дата возврата раньше даты отчета
+class OverdueBorrow(Borrow):
+    days_overdue: int
+
+
+# Просроченные займы одного читателя (id - id читателя)
+class OverdueReaderReport(BaseModel):
+    id: int
+    name: str
+    email: str
+    overdue_count: int
+    oldest_return_date: date
+
+
+# Просроченные займы одной книги (id - id книги)
+class OverdueBookReport(BaseModel):
+    id: int
+    title: str
+    overdue_count: int
+    oldest_return_date: date
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    row: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    created_ids: list[int] = []
+    errors: list[ImportRowError] = []
+
+    def add_error(self, row: int, detail: str) -> None:
+        self.errors.append(ImportRowError(row=row, detail=detail))
@@ -31,6 +31,14 @@ class UserResponse(BaseModel):
     is_admin: bool
 
 
+# Краткие данные пользователя для списков
+class UserSummary(BaseModel):
+    id: int
+    name: str
+    email: str
+    is_admin: bool
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
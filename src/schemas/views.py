@@ -0,0 +1,6 @@
+from typing import Literal
+
+
+# Вариант представления записей в списках: summary - только основные поля
+# (из базы читаются только они), detail - все поля
+ListView = Literal["summary", "detail"]
@@ -1,4 +1,5 @@
 from datetime import datetime, timezone, timedelta
+import time
 
 from fastapi import Request, Response
 from passlib.context import CryptContext
@@ -14,6 +15,8 @@ from src.exceptions import (
     WrongPasswordException,
 )
 from src.services.base import BaseService
+from src.utils.cache import token_cache
+from src.utils.executor import password_executor
 from src.config import settings
 
 
@@ -22,7 +25,9 @@ class AuthService(BaseService):
 
     def create_access_token(self, data: dict) -> str:
         to_encode = data.copy()
-        expire = datetime.now(timezone.utc) + timedelta(minutes=30)
+        expire = datetime.now(timezone.utc) + timedelta(
+            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+        )
         to_encode.update({"exp": expire})
         encoded_jwt = jwt.encode(
             to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
@@ -35,6 +40,13 @@ class AuthService(BaseService):
     def verify_password(self, plain_password, hashed_password) -> bool:
         return self.pwd_context.verify(plain_password, hashed_password)
 
+    # Асинхронные варианты выполняются в пуле потоков, чтобы не блокировать цикл событий
+    async def hash_password_async(self, password: str) -> str:
+        return await password_executor.run(self.hash_password, password)
+
+    async def verify_password_async(self, plain_password, hashed_password) -> bool:
+        return await password_executor.run(self.verify_password, plain_password, hashed_password)
+
     def decode_token(self, token: str) -> dict:
         try:
             return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
@@ -43,8 +55,18 @@ class AuthService(BaseService):
         except jwt.exceptions.ExpiredSignatureError:
             raise TokenExpireException
 
+    # Декодирование токена с кэшем: подпись проверяется только при первом запросе
+    # с этим токеном, дальше данные берутся из кэша до истечения срока действия токена
+    async def decode_token_cached(self, token: str) -> dict:
+        data = await token_cache.get(token)
+        if data is None:
+            data = self.decode_token(token)
+            if "exp" in data:
+                await token_cache.set(token, data, ttl=data["exp"] - time.time())
+        return data
+
     async def register_user(self, user_data: UserRequestAdd) -> User:
-        hashed_password = self.hash_password(user_data.password)
+        hashed_password = await self.hash_password_async(user_data.password)
         new_user_data = UserAdd(
             name=user_data.name, email=user_data.email, hashed_password=hashed_password
         )
@@ -60,8 +82,11 @@ class AuthService(BaseService):
             user = await self.db.user.get_user_by_email(user_data.email)
         except UserNotFoundException:
             raise UserNotFoundException
+        # Транзакция только читала данные, ее завершение возвращает соединение в пул,
+        # чтобы оно не простаивало, пока проверяется пароль
+        await self.db.rollback()
 
-        if not self.verify_password(user_data.password, user.hashed_password):
+        if not await self.verify_password_async(user_data.password, user.hashed_password):
             raise WrongPasswordException
         access_token = self.create_access_token({"user_id": user.id})
         response.set_cookie("access_token", access_token, httponly=True)
@@ -1,6 +1,15 @@
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+
+from src.config import settings
 from src.exceptions import AuthorNotFoundException, ObjectNotFoundException
 from src.services.base import BaseService
-from src.schemas.author import Author, AuthorAdd, AuthorPatch
+from src.schemas.author import Author, AuthorAdd, AuthorPatch, AuthorSummary
+from src.schemas.views import ListView
+from src.schemas.imports import ImportReport
+from src.utils.bulk import format_validation_error, insert_chunks
+from src.utils.cache import book_cache
 
 
 class AuthorService(BaseService):
@@ -9,8 +18,26 @@ class AuthorService(BaseService):
         await self.db.commit()
         return new_author
 
-    async def get_authors(self) -> list[Author]:
-        return await self.db.author.get_all()
+    async def get_authors(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+        view: ListView = "detail",
+    ) -> list[Author] | list[AuthorSummary]:
+        return await self.db.author.get_all(
+            limit=limit,
+            offset=offset,
+            after_id=after_id,
+            schema=AuthorSummary if view == "summary" else None,
+        )
+
+    async def count_authors(self) -> int:
+        return await self.db.author.count()
+
+    async def export_authors(self) -> AsyncIterator[Author]:
+        async for author in self.db.author.stream_all(batch_size=settings.EXPORT_BATCH_SIZE):
+            yield author
 
     async def get_author_by_id(self, id: int) -> Author:
         try:
@@ -18,12 +45,22 @@ class AuthorService(BaseService):
         except ObjectNotFoundException:
             raise AuthorNotFoundException
 
+    # ETag автора вычисляется по хешу строки в базе, поэтому совпадение ETag
+    # проверяется без получения и сериализации автора
+    async def get_author_etag(self, id: int) -> str:
+        row_hash = await self.db.author.get_row_hash(id=id)
+        if row_hash is None:
+            raise AuthorNotFoundException
+        return f'"{row_hash}"'
+
     async def edit_author(self, id: int, author_data: AuthorPatch) -> Author:
         try:
             edited_author = await self.db.author.update(id=id, data=author_data)
         except ObjectNotFoundException:
             raise AuthorNotFoundException
         await self.db.commit()
+        # Авторы входят в закэшированные книги
+        await book_cache.clear()
         return edited_author
 
     async def delete_author(self, id: int) -> Author:
@@ -32,4 +69,28 @@ class AuthorService(BaseService):
         except ObjectNotFoundException:
             raise AuthorNotFoundException
         await self.db.commit()
+        await book_cache.clear()
         return deleted_author
+
+    # Массовый импорт авторов. Строки валидируются заранее и записываются многострочными
+    # INSERT частями по IMPORT_CHUNK_SIZE строк, каждая часть - в своей транзакции.
+    # Часть с ошибкой записывается заново меньшими частями, чтобы найти ошибочные строки
+    async def import_authors(self, rows: list) -> ImportReport:
+        report = ImportReport()
+        valid_rows: list[tuple[int, AuthorAdd]] = []
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                valid_rows.append((row_number, AuthorAdd.model_validate(row)))
+            except ValidationError as e:
+                report.add_error(row_number, format_validation_error(e))
+
+        async def insert(chunk: list[tuple[int, AuthorAdd]]) -> list[int]:
+            new_authors = await self.db.author.add_many(
+                data=[author_data for _, author_data in chunk]
+            )
+            return [new_author.id for new_author in new_authors]
+
+        await insert_chunks(self.db, valid_rows, settings.IMPORT_CHUNK_SIZE, insert, report)
+
+        report.errors.sort(key=lambda error: error.row)
+        return report
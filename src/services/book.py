@@ -1,13 +1,52 @@
+from typing import AsyncIterator
+from uuid import uuid4
+
+from pydantic import ValidationError
+
+from src.config import settings
 from src.exceptions import BookNotFoundException, InvalidInputException, ObjectNotFoundException
 from src.schemas.book import (
     Book,
     BookAdd,
     BookAddRequest,
+    BookAvailability,
     BookPatch,
     BooksAuthorsAdd,
     BookPatchRequest,
+    BookSearchParams,
+    BookSummaryWithRels,
+    BookWithRels,
 )
+from src.schemas.author import AuthorSummary
+from src.schemas.views import ListView
+from src.schemas.imports import ImportReport
 from src.services.base import BaseService
+from src.utils.bulk import format_validation_error, insert_chunks
+from src.utils.cache import book_cache
+
+
+# Ключ версии списков книг в book_cache. Версия входит в ключи закэшированных списков,
+# поэтому удаление версии делает недействительными все списки без перебора ключей.
+# Если версии нет (удалена, истекла или вытеснена), создается новая, и старые списки
+# больше не читаются
+LIST_VERSION_KEY = "list_version"
+
+
+async def get_list_version() -> str:
+    version = await book_cache.get(LIST_VERSION_KEY)
+    if version is None:
+        version = uuid4().hex
+        await book_cache.set(LIST_VERSION_KEY, version)
+    return version
+
+
+# Функция для сброса закэшированных данных, которые зависят от количества доступных
+# экземпляров книги: карточки книги, ее ETag и списков книг. Количество книг
+# и остальные карточки не меняются, поэтому остаются в кэше
+async def invalidate_book_copies(book_id: int) -> None:
+    await book_cache.delete(f"id:{book_id}")
+    await book_cache.delete(f"etag:{book_id}")
+    await book_cache.delete(LIST_VERSION_KEY)
 
 
 class BookService(BaseService):
@@ -23,29 +62,106 @@ class BookService(BaseService):
         ]
         await self.db.books_authors.add_many(data=books_authors_data)
         await self.db.commit()
+        await book_cache.clear()
         return new_book
 
-    async def get_books(self) -> list[Book]:
-        return await self.db.book.get_book_with_rels()
+    # Списки и отдельные книги читаются через book_cache, который полностью сбрасывается
+    # при изменении книг и их авторов. При выдаче и возврате книги сбрасываются
+    # только ее карточка и списки (invalidate_book_copies)
+    async def get_books(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+        view: ListView = "detail",
+    ) -> list[BookWithRels] | list[BookSummaryWithRels]:
+        key = f"list:{await get_list_version()}:{view}:{limit}:{offset}:{after_id}"
+        books = await book_cache.get(key)
+        if books is not None:
+            return books
+
+        schemas = {}
+        if view == "summary":
+            schemas = {"schema": BookSummaryWithRels, "author_schema": AuthorSummary}
+        try:
+            books = await self.db.book.get_book_with_rels(
+                limit=limit, offset=offset, after_id=after_id, **schemas
+            )
+        except ObjectNotFoundException:
+            # Пустая страница списка - не ошибка
+            books = []
+        await book_cache.set(key, books)
+        return books
+
+    async def count_books(self) -> int:
+        total = await book_cache.get("count")
+        if total is None:
+            total = await self.db.book.count()
+            await book_cache.set("count", total)
+        return total
+
+    # Наличие экземпляров не кэшируется: наборы id на страницах результатов редко
+    # повторяются, а запрос по первичному ключу и так быстрый
+    async def get_books_availability(self, ids: list[int]) -> list[BookAvailability]:
+        return await self.db.book.get_availability(ids=sorted(set(ids)))
+
+    async def search_books(
+        self,
+        params: BookSearchParams,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[BookWithRels]:
+        return await self.db.book.search(
+            params=params, limit=limit, offset=offset, after_id=after_id
+        )
+
+    async def count_search_books(self, params: BookSearchParams) -> int:
+        return await self.db.book.count_search(params=params)
+
+    async def export_books(self) -> AsyncIterator[BookWithRels]:
+        async for book in self.db.book.stream_book_with_rels(batch_size=settings.EXPORT_BATCH_SIZE):
+            yield book
 
     async def get_book_by_id(self, id: int) -> Book:
-        return await self.db.book.get_book_with_rels(id=id)
+        key = f"id:{id}"
+        book = await book_cache.get(key)
+        if book is None:
+            book = await self.db.book.get_book_with_rels(id=id)
+            await book_cache.set(key, book)
+        return book
+
+    # ETag книги хранится в book_cache и сбрасывается вместе с закэшированной книгой,
+    # поэтому совпадение ETag проверяется без запроса к базе и сериализации книги
+    async def get_book_etag(self, id: int) -> str | None:
+        return await book_cache.get(f"etag:{id}")
+
+    async def save_book_etag(self, id: int, etag: str) -> None:
+        await book_cache.set(f"etag:{id}", etag)
 
-    async def edit_book(self, id: int, book_data: BookPatchRequest) -> Book:
-        _book_data = BookPatch(**book_data.model_dump(exclude_unset=True))
+    # Книга с авторами собирается из результатов UPDATE ... RETURNING и запроса,
+    # изменяющего авторов, без повторного получения книги из базы.
+    # Если author_ids не переданы, авторы книги не меняются
+    async def edit_book(self, id: int, book_data: BookPatchRequest) -> list[BookWithRels]:
+        _book_data = BookPatch(**book_data.model_dump(exclude_unset=True, exclude={"author_ids"}))
         try:
-            if any(dict(_book_data).values()):
-                edited_book = await self.db.book.update(id=id, data=_book_data)
+            if _book_data.model_fields_set:
+                book = await self.db.book.update(id=id, data=_book_data)
+            else:
+                book = await self.db.book.get_by_id(id=id)
+        except ObjectNotFoundException:
+            raise BookNotFoundException
 
-            await self.db.books_authors.edit_authors_ids(
+        if book_data.author_ids is None:
+            authors = await self.db.books_authors.get_book_authors(book_id=id)
+        else:
+            authors = await self.db.books_authors.edit_authors_ids(
                 book_id=id, new_authors_ids=book_data.author_ids
             )
-            edited_book = await self.db.book.get_book_with_rels(id=id)
-        except ObjectNotFoundException:
-            raise BookNotFoundException
 
         await self.db.commit()
-        return edited_book
+        await book_cache.clear()
+        return [BookWithRels(**book.model_dump(), authors=authors)]
 
     async def delete_book(self, id: int) -> Book:
         try:
@@ -53,4 +169,55 @@ class BookService(BaseService):
         except ObjectNotFoundException:
             raise BookNotFoundException
         await self.db.commit()
+        await book_cache.clear()
         return deleted_book
+
+    # Массовый импорт книг. Строки валидируются заранее, id авторов всех строк проверяются
+    # одним запросом, книги и связи с авторами записываются многострочными INSERT
+    # частями по IMPORT_CHUNK_SIZE строк, каждая часть - в своей транзакции.
+    # Ошибки отдельных строк не прерывают импорт и возвращаются в отчете
+    # (часть с ошибкой записывается заново меньшими частями)
+    async def import_books(self, rows: list) -> ImportReport:
+        report = ImportReport()
+        valid_rows: list[tuple[int, BookAddRequest]] = []
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                book_data = BookAddRequest.model_validate(row)
+            except ValidationError as e:
+                report.add_error(row_number, format_validation_error(e))
+                continue
+            if book_data.available_copies < 0:
+                report.add_error(row_number, "available_copies: значение не может быть меньше 0")
+                continue
+            valid_rows.append((row_number, book_data))
+
+        author_ids = {a_id for _, book_data in valid_rows for a_id in book_data.author_ids}
+        existing_author_ids = await self.db.author.get_existing_ids(author_ids)
+        rows_to_insert = []
+        for row_number, book_data in valid_rows:
+            missing_ids = set(book_data.author_ids) - existing_author_ids
+            if missing_ids:
+                report.add_error(
+                    row_number, f"author_ids: авторы не найдены: {sorted(missing_ids)}"
+                )
+                continue
+            rows_to_insert.append((row_number, book_data))
+
+        async def insert(chunk: list[tuple[int, BookAddRequest]]) -> list[int]:
+            new_books = await self.db.book.add_many(
+                data=[BookAdd(**book_data.model_dump()) for _, book_data in chunk]
+            )
+            books_authors_data = [
+                BooksAuthorsAdd(book_id=new_book.id, author_id=a_id)
+                for new_book, (_, book_data) in zip(new_books, chunk)
+                for a_id in set(book_data.author_ids)
+            ]
+            await self.db.books_authors.add_many(data=books_authors_data)
+            return [new_book.id for new_book in new_books]
+
+        await insert_chunks(self.db, rows_to_insert, settings.IMPORT_CHUNK_SIZE, insert, report)
+
+        if report.created_ids:
+            await book_cache.clear()
+        report.errors.sort(key=lambda error: error.row)
+        return report
@@ -1,63 +1,155 @@
 from datetime import date
+from typing import AsyncIterator, Literal
 
+from src.config import settings
 from src.exceptions import (
     BookAlreadyReturnedException,
     BookNotFoundException,
+    BorrowNotFoundException,
     MaxBooksLimitExceededException,
     NoAvailableCopiesException,
     ObjectNotFoundException,
     check_date,
 )
 from src.schemas.user import User
-from src.schemas.borrow import Borrow, BorrowAdd, BorrowAddRequest
+from src.schemas.borrow import (
+    Borrow,
+    BorrowAdd,
+    BorrowAddRequest,
+    BorrowWithBook,
+    OverdueBookReport,
+    OverdueBorrow,
+    OverdueReaderReport,
+    ReaderBorrowsParams,
+)
 from src.services.base import BaseService
+from src.services.book import invalidate_book_copies
+from src.utils.cache import user_cache
+
+
+# Максимальное количество книг, которое читатель может взять одновременно
+MAX_BORROWED_BOOKS = 5
 
 
 class BorrowService(BaseService):
+    # Выдача и возврат книги выполняются условными UPDATE в одной транзакции:
+    # проверка и изменение счетчиков происходят атомарно в базе, а измененные строки
+    # остаются заблокированными до коммита. Строки блокируются всегда в порядке
+    # books -> users, чтобы параллельные выдачи и возвраты не приводили к взаимоблокировкам
     async def add_borrow(self, borrow_data: BorrowAddRequest, user: User) -> Borrow:
         check_date(borrow_date=borrow_data.borrow_date, return_date=borrow_data.return_date)
-        try:
-            book = await self.db.book.get_by_id(id=borrow_data.book_id)
-        except ObjectNotFoundException:
-            raise BookNotFoundException
 
-        if book.available_copies <= 0:
+        book = await self.db.book.change_available_copies(book_id=borrow_data.book_id, delta=-1)
+        if book is None:
+            try:
+                await self.db.book.get_by_id(id=borrow_data.book_id)
+            except ObjectNotFoundException:
+                raise BookNotFoundException
             raise NoAvailableCopiesException
-        book.available_copies -= 1
 
-        if user.borrowed_books >= 5:
+        reader = await self.db.user.change_borrowed_books(
+            user_id=user.id, delta=1, max_books=MAX_BORROWED_BOOKS
+        )
+        if reader is None:
             raise MaxBooksLimitExceededException
-        user.borrowed_books += 1
 
         _borrow_data = BorrowAdd(reader_id=user.id, **borrow_data.model_dump(), is_returned=False)
         borrow = await self.db.borrow.create(data=_borrow_data)
-        await self.db.book.update(id=book.id, data=book)
-        await self.db.user.update(id=user.id, data=user)
         await self.db.commit()
+        await user_cache.delete(user.id)
+        await invalidate_book_copies(borrow_data.book_id)
         return borrow
 
-    async def get_borrows(self) -> list[Borrow]:
-        return await self.db.borrow.get_all()
+    async def get_borrows(
+        self, limit: int | None = None, offset: int | None = None, after_id: int | None = None
+    ) -> list[Borrow]:
+        return await self.db.borrow.get_all(limit=limit, offset=offset, after_id=after_id)
 
-    async def get_my_borrows(self, user_id: int) -> list[Borrow]:
-        return await self.db.borrow.get_filtered(reader_id=user_id)
+    async def count_borrows(self) -> int:
+        return await self.db.borrow.count()
 
-    async def return_book(self, id: int, return_date: date, user: User) -> Borrow:
-        borrow = await self.db.borrow.get_by_id(id=id)
-        check_date(borrow_date=borrow.borrow_date, return_date=return_date)
-        if borrow.is_returned:
-            raise BookAlreadyReturnedException
+    async def export_borrows(self) -> AsyncIterator[Borrow]:
+        async for borrow in self.db.borrow.stream_all(batch_size=settings.EXPORT_BATCH_SIZE):
+            yield borrow
+
+    # Отчеты по просроченным займам строятся в базе по частичному индексу незавершенных
+    # займов. Если дата отчета не передана, используется текущая дата
+    async def get_overdue(
+        self,
+        as_of: date | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[OverdueBorrow]:
+        return await self.db.borrow.get_overdue(
+            as_of=as_of or date.today(), limit=limit, offset=offset, after_id=after_id
+        )
+
+    async def count_overdue(
+        self,
+        as_of: date | None = None,
+        by: Literal["borrow", "reader", "book"] = "borrow",
+    ) -> int:
+        return await self.db.borrow.count_overdue(as_of=as_of or date.today(), by=by)
 
-        book = await self.db.book.get_by_id(id=borrow.book_id)
+    async def export_overdue(self, as_of: date | None = None) -> AsyncIterator[OverdueBorrow]:
+        async for borrow in self.db.borrow.stream_overdue(
+            as_of=as_of or date.today(), batch_size=settings.EXPORT_BATCH_SIZE
+        ):
+            yield borrow
 
-        book.available_copies += 1
-        borrow.return_date = return_date
-        borrow.is_returned = True
-        user.borrowed_books -= 1
+    async def get_overdue_by_reader(
+        self,
+        as_of: date | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[OverdueReaderReport]:
+        return await self.db.borrow.get_overdue_by_reader(
+            as_of=as_of or date.today(), limit=limit, offset=offset, after_id=after_id
+        )
+
+    async def get_overdue_by_book(
+        self,
+        as_of: date | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[OverdueBookReport]:
+        return await self.db.borrow.get_overdue_by_book(
+            as_of=as_of or date.today(), limit=limit, offset=offset, after_id=after_id
+        )
+
+    async def get_reader_borrows(
+        self,
+        reader_id: int,
+        params: ReaderBorrowsParams,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+    ) -> list[Borrow] | list[BorrowWithBook]:
+        return await self.db.borrow.get_by_reader(
+            reader_id=reader_id, params=params, limit=limit, offset=offset, after_id=after_id
+        )
+
+    async def count_reader_borrows(self, reader_id: int, params: ReaderBorrowsParams) -> int:
+        return await self.db.borrow.count_by_reader(reader_id=reader_id, params=params)
+
+    async def return_book(self, id: int, return_date: date) -> Borrow:
+        borrow = await self.db.borrow.close_borrow(id=id, return_date=return_date)
+        if borrow is None:
+            # Займ не закрылся - выясняем причину, чтобы вернуть понятную ошибку
+            try:
+                borrow = await self.db.borrow.get_by_id(id=id)
+            except ObjectNotFoundException:
+                raise BorrowNotFoundException
+            check_date(borrow_date=borrow.borrow_date, return_date=return_date)
+            raise BookAlreadyReturnedException
 
-        await self.db.book.update(id=book.id, data=book)
-        await self.db.borrow.update(id=borrow.id, data=borrow)
-        await self.db.user.update(id=user.id, data=user)
+        await self.db.book.change_available_copies(book_id=borrow.book_id, delta=1)
+        await self.db.user.change_borrowed_books(user_id=borrow.reader_id, delta=-1)
 
         await self.db.commit()
+        await user_cache.delete(borrow.reader_id)
+        await invalidate_book_copies(borrow.book_id)
         return borrow
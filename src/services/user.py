@@ -1,33 +1,53 @@
 from pydantic import BaseModel
 from src.exceptions import InvalidInputException, ObjectNotFoundException, UserNotFoundException
-from src.schemas.user import UserIsAdminRequest, UserPatch, UserResponse
+from src.schemas.user import UserIsAdminRequest, UserPatch, UserResponse, UserSummary
+from src.schemas.views import ListView
 from src.services.base import BaseService
+from src.utils.cache import user_cache
 
 
 class UserService(BaseService):
+    # Пользователь берется из кэша, если он там есть. Возвращается копия,
+    # чтобы изменения объекта вызывающим кодом не попадали в кэш
     async def get_user_by_id(self, user_id: int) -> UserResponse:
-        try:
-            user = await self.db.user.get_by_id(user_id)
-            return UserResponse(**user.model_dump())
-        except ObjectNotFoundException:
-            raise UserNotFoundException
+        user = await user_cache.get(user_id)
+        if user is None:
+            try:
+                user = await self.db.user.get_by_id(user_id, schema=UserResponse)
+            except ObjectNotFoundException:
+                raise UserNotFoundException
+            await user_cache.set(user_id, user)
+        return user.model_copy()
 
-    async def get_all_users(self) -> list[UserResponse]:
+    # Из базы читаются только поля схемы ответа (хеш пароля не читается никогда),
+    # строки приводятся к схеме ответа один раз
+    async def get_all_users(
+        self,
+        limit: int | None = None,
+        offset: int | None = None,
+        after_id: int | None = None,
+        view: ListView = "detail",
+    ) -> list[UserResponse] | list[UserSummary]:
         try:
-            users = await self.db.user.get_all()
-            users_response = []
-            for i in range(len(users)):
-                users_response.append(UserResponse(**users[i].model_dump()))
-            return users_response
+            return await self.db.user.get_all(
+                limit=limit,
+                offset=offset,
+                after_id=after_id,
+                schema=UserSummary if view == "summary" else UserResponse,
+            )
         except ObjectNotFoundException:
             raise UserNotFoundException
 
+    async def count_users(self) -> int:
+        return await self.db.user.count()
+
     async def edit_user(self, user_data: UserPatch, id: int) -> UserResponse:
         try:
             edited_user = await self.db.user.update(id=id, data=user_data)
         except InvalidInputException:
             raise InvalidInputException
         await self.db.commit()
+        await user_cache.delete(id)
         return UserResponse(**edited_user.model_dump())
 
     async def turn_to_admin(self, is_admin: UserIsAdminRequest, id: int) -> UserResponse:
@@ -36,4 +56,5 @@ class UserService(BaseService):
         except ObjectNotFoundException:
             raise UserNotFoundException
         await self.db.commit()
+        await user_cache.delete(id)
         return user
@@ -2,6 +2,8 @@ from typing import AsyncGenerator
 from httpx import AsyncClient
 import pytest
 
+from src.utils.cache import token_cache
+
 
 # Дополнительная фикстура для тестирования auth api, которая будет создавать пользователя 
 # и авторизовывать его, чтобы когда будет тестироваться test_logout мы не
@@ -37,6 +39,15 @@ async def test_get_me(auth_ac: AsyncClient):
     response = await auth_ac.get(url="/auth/me")
     assert response.status_code == 200
 
+async def test_token_cache(auth_ac: AsyncClient):
+    hits = token_cache.hits
+    await auth_ac.get(url="/auth/me")
+    response = await auth_ac.get(url="/auth/me")
+    assert response.status_code == 200
+    # Повторные запросы с тем же токеном не проверяют его подпись заново
+    assert token_cache.hits >= hits + 2
+    assert await token_cache.get(auth_ac.cookies["access_token"]) is not None
+
 async def test_logout(auth_ac: AsyncClient):
     response = await auth_ac.post(url="/auth/")
     assert response.status_code == 200
@@ -1,4 +1,7 @@
 from httpx import AsyncClient
+from sqlalchemy import event
+
+from src.database import engine
 
 
 async def test_add_author(admin_ac: AsyncClient):
@@ -19,11 +22,47 @@ async def test_get_authors(admin_ac: AsyncClient):
     response = await admin_ac.get("/authors")
     assert response.status_code == 200
 
+async def test_get_authors_summary(admin_ac: AsyncClient):
+    response = await admin_ac.get("/authors", params={"view": "summary"})
+    assert response.status_code == 200
+    assert set(response.json()["data"][0]) == {"id", "name"}
+
+async def test_get_authors_pagination(admin_ac: AsyncClient):
+    response = await admin_ac.get("/authors", params={"page": 1, "per_page": 2})
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 2
+    assert response.json()["total"] == 4
+
 async def test_get_author_by_id(admin_ac: AsyncClient):
     response = await admin_ac.get("/authors/1")
     assert response.status_code == 200
     assert response.json()["data"]["id"] == 1
 
+async def test_get_author_by_id_etag(admin_ac: AsyncClient):
+    response = await admin_ac.get("/authors/2")
+    etag = response.headers["ETag"]
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = await admin_ac.get("/authors/2", headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 304
+    assert response.content == b""
+    # Для ответа 304 читается только хеш строки автора
+    assert len(statements) == 1
+    assert "md5" in statements[0]
+
+    await admin_ac.put("/authors/2", json={"biography": "etag_biography"})
+    response = await admin_ac.get("/authors/2", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
 async def test_edit_author(admin_ac: AsyncClient):
     response = await admin_ac.put(
         "/authors/1",
@@ -41,4 +80,12 @@ async def test_delete_author(admin_ac: AsyncClient):
     response = await admin_ac.delete("/authors/1")
     assert response.status_code == 200
     assert response.json()["data"]["id"] == 1
-    
\ No newline at end of file
+    
+async def test_import_authors_csv(admin_ac: AsyncClient):
+    content = "name,biography,birth_date\ncsv_1,bio,2000-01-01\ncsv_2,bio,not a date\n"
+    response = await admin_ac.post(
+        "/authors/import", content=content, headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["data"]["created_ids"]) == 1
+    assert [error["row"] for error in response.json()["data"]["errors"]] == [2]
@@ -1,4 +1,12 @@
+import csv
+import io
+import json
+
 from httpx import AsyncClient
+from sqlalchemy import event
+
+from src.database import engine
+from src.utils.cache import book_cache
 
 
 async def test_add_book(admin_ac: AsyncClient):
@@ -24,6 +32,86 @@ async def test_get_books(admin_ac: AsyncClient):
     response = await admin_ac.get("/books")
     assert response.status_code == 200
 
+async def test_get_books_summary(admin_ac: AsyncClient):
+    response = await admin_ac.get("/books", params={"view": "summary"})
+    assert response.status_code == 200
+    books = response.json()["data"]
+    assert all("description" not in book for book in books)
+    authors = [author for book in books for author in book["authors"]]
+    assert authors and all(set(author) == {"id", "name"} for author in authors)
+
+    response = await admin_ac.get("/books", params={"view": "detail"})
+    assert "description" in response.json()["data"][0]
+
+async def test_get_books_pagination(admin_ac: AsyncClient):
+    response = await admin_ac.get("/books", params={"page": 2, "per_page": 2})
+    assert response.status_code == 200
+    assert response.json()["total"] == 4
+    assert [book["id"] for book in response.json()["data"]] == [3, 4]
+
+    response = await admin_ac.get("/books", params={"page": 10, "per_page": 2})
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+
+async def test_get_books_cursor(admin_ac: AsyncClient):
+    response = await admin_ac.get("/books", params={"after_id": 0, "per_page": 3})
+    assert response.status_code == 200
+    assert [book["id"] for book in response.json()["data"]] == [1, 2, 3]
+    assert response.json()["total"] is None
+    assert response.json()["next_after_id"] == 3
+
+    response = await admin_ac.get("/books", params={"after_id": 3, "per_page": 3})
+    assert [book["id"] for book in response.json()["data"]] == [4]
+    assert response.json()["next_after_id"] is None
+
+async def test_search_books(admin_ac: AsyncClient):
+    async def search_ids(**params) -> list[int]:
+        response = await admin_ac.get("/books/search", params=params)
+        assert response.status_code == 200
+        return [book["id"] for book in response.json()["data"]]
+
+    assert await search_ids(q="романы") == [1, 3]
+    assert await search_ids(q="роман", genre="Психологический роман") == [3]
+    assert await search_ids(date_from="1865-01-01", date_to="1866-12-31") == [2, 3]
+    assert await search_ids(author_id=2) == [4]
+    assert await search_ids(q="несуществующее") == []
+
+async def test_get_books_availability(admin_ac: AsyncClient):
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = await admin_ac.post("/books/availability", json={"ids": [3, 2, 3, 9999]})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    # Несуществующая книга пропускается, повторяющиеся id возвращаются один раз
+    assert [book["id"] for book in data] == [2, 3]
+    assert len(statements) == 1
+    book = (await admin_ac.get("/books/2")).json()["data"][0]
+    assert data[0]["available_copies"] == book["available_copies"]
+
+    response = await admin_ac.post("/books/availability", json={"ids": []})
+    assert response.status_code == 422
+
+async def test_export_books(admin_ac: AsyncClient):
+    response = await admin_ac.get("/books/export")
+    assert response.status_code == 200
+    books = [json.loads(line) for line in response.text.splitlines()]
+    assert [book["id"] for book in books] == [1, 2, 3, 4]
+    assert books[3]["authors"][0]["id"] == 2
+
+    response = await admin_ac.get("/books/export", params={"format": "csv"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 4
+    assert rows[3]["author_ids"] == "2"
+
 async def test_get_book_by_id(admin_ac: AsyncClient):
     response = await admin_ac.get("/books/1")
     assert response.status_code == 200
@@ -42,8 +130,138 @@ async def test_edit_book(admin_ac: AsyncClient):
     assert response.json()["data"][0]["description"] == "description"
     assert response.json()["data"][0]["genre"] == "genre"
 
+async def test_edit_book_authors(admin_ac: AsyncClient):
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        # Запросы пользователя для аутентификации не учитываются
+        if "FROM users" not in statement:
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = await admin_ac.put("/books/2", json={"title": "title_2", "author_ids": [3, 2]})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == 200
+    assert response.json()["data"][0]["title"] == "title_2"
+    assert [author["id"] for author in response.json()["data"][0]["authors"]] == [2, 3]
+    # UPDATE книги и один запрос на изменение и получение авторов
+    assert len(statements) == 2
+
+    response = await admin_ac.put("/books/2", json={"author_ids": [3]})
+    assert [author["id"] for author in response.json()["data"][0]["authors"]] == [3]
+    response = await admin_ac.put("/books/2", json={"genre": "genre"})
+    assert [author["id"] for author in response.json()["data"][0]["authors"]] == [3]
+
+async def test_book_cache(admin_ac: AsyncClient):
+    await admin_ac.get("/books/3")
+    hits = book_cache.hits
+    response = await admin_ac.get("/books/3")
+    assert response.json()["data"][0]["id"] == 3
+    assert book_cache.hits > hits
+
+    # Изменение книги сбрасывает кэш
+    hits = book_cache.hits
+    await admin_ac.put("/books/3", json={"title": "cached_title"})
+    response = await admin_ac.get("/books/3")
+    assert response.json()["data"][0]["title"] == "cached_title"
+    assert book_cache.hits == hits
+
+    response = await admin_ac.get("/system/cache")
+    assert response.status_code == 200
+    assert response.json()["data"]["books"]["hits"] == book_cache.hits
+
+async def test_get_book_by_id_etag(admin_ac: AsyncClient):
+    response = await admin_ac.get("/books/3")
+    etag = response.headers["ETag"]
+
+    response = await admin_ac.get("/books/3", headers={"If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    # Изменение книги меняет ETag
+    await admin_ac.put("/books/3", json={"genre": "etag_genre"})
+    response = await admin_ac.get("/books/3", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["data"][0]["genre"] == "etag_genre"
+    assert response.headers["ETag"] != etag
+
+async def test_cached_book_without_connection(admin_ac: AsyncClient):
+    response = await admin_ac.get("/books/3")
+    etag = response.headers["ETag"]
+    checkouts = []
+
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.append(connection_record)
+
+    event.listen(engine.sync_engine, "checkout", count_checkout)
+    try:
+        response = await admin_ac.get("/books/3")
+        not_modified = await admin_ac.get("/books/3", headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine.sync_engine, "checkout", count_checkout)
+
+    assert response.json()["data"][0]["id"] == 3
+    assert not_modified.status_code == 304
+    # Ответы из кэша не получают соединение из пула
+    assert checkouts == []
+
 async def test_delete_book(admin_ac: AsyncClient):
     response = await admin_ac.delete("/books/1")
     assert response.status_code == 200
     assert response.json()["data"]["id"] == 1
-    
\ No newline at end of file
+    
+async def test_import_books(admin_ac: AsyncClient):
+    book = {
+        "title": "import",
+        "description": "import",
+        "date_of_publication": "2000-01-01",
+        "author_ids": [2],
+        "genre": "test",
+        "available_copies": 1,
+    }
+    response = await admin_ac.post(
+        "/books/import",
+        json=[book, {**book, "title": None}, {**book, "author_ids": [999]}],
+    )
+    assert response.status_code == 200
+    report = response.json()["data"]
+    assert len(report["created_ids"]) == 1
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+
+    response = await admin_ac.get(f"/books/{report['created_ids'][0]}")
+    assert [author["id"] for author in response.json()["data"][0]["authors"]] == [2]
+
+async def test_import_books_row_errors(admin_ac: AsyncClient):
+    book = {
+        "title": "import",
+        "description": "import",
+        "date_of_publication": "2000-01-01",
+        "genre": "test",
+        "available_copies": 1,
+    }
+    # Слишком длинное название отклоняется при валидации, а значение, которое не помещается
+    # в столбец, - при записи. В обоих случаях остальные строки добавляются
+    response = await admin_ac.post(
+        "/books/import",
+        json=[book, {**book, "title": "t" * 150}, book, {**book, "available_copies": 2**40}, book],
+    )
+    report = response.json()["data"]
+    assert len(report["created_ids"]) == 3
+    assert [error["row"] for error in report["errors"]] == [2, 4]
+    assert report["errors"][0]["detail"].startswith("title")
+
+async def test_import_books_ndjson(admin_ac: AsyncClient):
+    content = (
+        "not json\n"
+        '{"title": "ndjson", "description": "", "date_of_publication": "2000-01-01", '
+        '"genre": "test", "available_copies": 1}\n'
+    )
+    response = await admin_ac.post(
+        "/books/import", content=content, headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["data"]["created_ids"]) == 1
+    assert [error["row"] for error in response.json()["data"]["errors"]] == [1]
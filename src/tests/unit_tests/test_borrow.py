@@ -1,4 +1,20 @@
-from httpx import AsyncClient
+import asyncio
+import csv
+import io
+import json
+from datetime import date
+
+from httpx import ASGITransport, AsyncClient
+
+from src.database import async_session_maker
+from src.exceptions import MaxBooksLimitExceededException, NoAvailableCopiesException
+from src.main import app
+from src.schemas.book import BookAdd
+from src.schemas.borrow import BorrowAddRequest
+from src.schemas.user import User, UserAdd
+from src.services.borrow import BorrowService
+from src.utils.cache import book_cache
+from src.utils.db_manager import DBManager
 
 
 async def test_add_borrow(admin_ac: AsyncClient):
@@ -21,11 +37,76 @@ async def test_get_borrows(admin_ac: AsyncClient):
     assert response.status_code == 200
     print(response.json())
 
+async def test_export_borrows(admin_ac: AsyncClient):
+    response = await admin_ac.get(url="/borrows/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 4
+    assert rows[-1]["book_id"] == "2"
+
 async def test_get_my_borrows(admin_ac: AsyncClient):
     response = await admin_ac.get(url="/borrows/1")
     assert response.status_code == 200
     print(response.json())
+
+async def test_get_reader_borrows_filters(admin_ac: AsyncClient):
+    response = await admin_ac.get(url="/borrows/1", params={"order": "asc", "per_page": 2})
+    assert [borrow["id"] for borrow in response.json()["data"]] == [1, 2]
+    assert response.json()["total"] == 3
+    assert response.json()["next_after_id"] == 2
+
+    response = await admin_ac.get(url="/borrows/1", params={"order": "asc", "after_id": 2})
+    assert [borrow["id"] for borrow in response.json()["data"]] == [3]
+
+    response = await admin_ac.get(url="/borrows/1", params={"after_id": 3})
+    assert [borrow["id"] for borrow in response.json()["data"]] == [2, 1]
+
+    response = await admin_ac.get(
+        url="/borrows/1",
+        params={"date_from": "2024-12-12", "status": "open", "with_titles": True},
+    )
+    data = response.json()["data"]
+    assert [borrow["id"] for borrow in data] == [3, 2]
+    assert all(borrow["book_title"] for borrow in data)
+
+    response = await admin_ac.get(url="/borrows/1", params={"status": "closed"})
+    assert response.json()["data"] == []
+
+async def test_get_reader_borrows_permissions():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as user_ac:
+        await user_ac.post(url="/auth/login", json={"email": "user@test.com", "password": "user"})
+        response = await user_ac.get(url="/borrows/1")
+        assert response.status_code == 200
+        assert {borrow["reader_id"] for borrow in response.json()["data"]} == {1}
+
+        # Займы другого читателя доступны только администратору
+        response = await user_ac.get(url="/borrows/2")
+        assert response.status_code == 403
     
+async def test_get_overdue_borrows(admin_ac: AsyncClient):
+    params = {"as_of": "2025-01-02"}
+    response = await admin_ac.get(url="/borrows/overdue", params=params)
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [borrow["id"] for borrow in data] == [1, 4]
+    assert data[0]["days_overdue"] == 1
+    assert response.json()["total"] == 2
+
+    response = await admin_ac.get(url="/borrows/overdue/readers", params=params)
+    readers = {reader["id"]: reader for reader in response.json()["data"]}
+    assert readers[1]["overdue_count"] == 1
+    assert readers[1]["oldest_return_date"] == "2025-01-01"
+    assert response.json()["total"] == len(readers)
+
+    response = await admin_ac.get(url="/borrows/overdue/books", params=params)
+    assert [book["id"] for book in response.json()["data"]] == [2]
+    assert response.json()["data"][0]["overdue_count"] == 2
+
+    response = await admin_ac.get(url="/borrows/overdue/export", params=params)
+    assert response.status_code == 200
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [1, 4]
+
 async def test_return_book(admin_ac: AsyncClient):
     response = await admin_ac.patch(
         url="/borrows/1/return",
@@ -35,3 +116,75 @@ async def test_return_book(admin_ac: AsyncClient):
     )
     assert response.status_code == 200
     assert response.json()["data"]["is_returned"] == True
+
+
+# Параллельно отправляет attempts запросов на выдачу книги и возвращает количество успешных
+async def borrow_concurrently(book_id: int, reader: User, attempts: int) -> int:
+    async def borrow() -> bool:
+        async with DBManager(session_factory=async_session_maker) as db:
+            borrow_data = BorrowAddRequest(
+                book_id=book_id, borrow_date=date(2000, 1, 1), return_date=date(2000, 1, 2)
+            )
+            try:
+                await BorrowService(db).add_borrow(borrow_data=borrow_data, user=reader)
+            except (NoAvailableCopiesException, MaxBooksLimitExceededException):
+                return False
+            return True
+
+    results = await asyncio.gather(*[borrow() for _ in range(attempts)])
+    return sum(results)
+
+
+async def test_add_borrow_concurrent(setup_database):
+    async with DBManager(session_factory=async_session_maker) as db:
+        book_data = BookAdd(
+            title="stress",
+            description="stress",
+            date_of_publication=date(2000, 1, 1),
+            genre="test",
+            available_copies=3,
+        )
+        scarce_book = await db.book.create(book_data)
+        plenty_book = await db.book.create(book_data.model_copy(update={"available_copies": 10}))
+        reader = await db.user.create(
+            UserAdd(name="stress", email="stress@test.com", hashed_password="stress")
+        )
+        await db.commit()
+
+    # Копий меньше, чем запросов: выдать можно ровно столько, сколько копий
+    assert await borrow_concurrently(scarce_book.id, reader, attempts=20) == 3
+    # Копий достаточно, но у читателя лимит на количество книг (3 уже взяты)
+    assert await borrow_concurrently(plenty_book.id, reader, attempts=10) == 2
+
+    async with DBManager(session_factory=async_session_maker) as db:
+        assert (await db.book.get_by_id(scarce_book.id)).available_copies == 0
+        assert (await db.book.get_by_id(plenty_book.id)).available_copies == 8
+        assert (await db.user.get_by_id(reader.id)).borrowed_books == 5
+
+
+async def test_borrow_invalidates_book_cache(admin_ac: AsyncClient):
+    params = {"per_page": 10}
+    copies = (await admin_ac.get("/books/3")).json()["data"][0]["available_copies"]
+    await admin_ac.get("/books/2")
+    await admin_ac.get("/books", params=params)
+
+    response = await admin_ac.post(
+        "/borrows",
+        json={"book_id": 3, "borrow_date": "2000-01-01", "return_date": "2000-01-02"},
+    )
+    borrow_id = response.json()["data"]["id"]
+
+    # Карточки других книг остаются в кэше, карточка и списки с выданной книгой обновляются
+    hits = book_cache.hits
+    await admin_ac.get("/books/2")
+    assert book_cache.hits > hits
+    response = await admin_ac.get("/books/3")
+    assert response.json()["data"][0]["available_copies"] == copies - 1
+    books = (await admin_ac.get("/books", params=params)).json()["data"]
+    assert {book["id"]: book["available_copies"] for book in books}[3] == copies - 1
+
+    await admin_ac.patch(f"/borrows/{borrow_id}/return", params={"return_date": "2000-01-02"})
+    response = await admin_ac.get("/books/3")
+    assert response.json()["data"][0]["available_copies"] == copies
+    books = (await admin_ac.get("/books", params=params)).json()["data"]
+    assert {book["id"]: book["available_copies"] for book in books}[3] == copies
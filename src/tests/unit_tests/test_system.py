@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+import queue
+import sys
+import threading
+
+from httpx import AsyncClient
+
+from src.config import settings
+from src.database import ReplicaRouter, async_session_maker, pool_stats
+from src.logger import JsonFormatter, LogQueueHandler
+from src.utils.db_manager import DBManager
+from src.utils.executor import BoundedExecutor
+
+
+async def test_get_pool(admin_ac: AsyncClient):
+    response = await admin_ac.get("/system/pool")
+    assert response.status_code == 200
+    assert response.json()["data"]["acquired"] > 0
+    assert response.json()["data"]["failed"] == 0
+
+async def test_get_password_hasher(admin_ac: AsyncClient):
+    response = await admin_ac.get("/system/password-hasher")
+    assert response.status_code == 200
+    assert response.json()["data"]["completed"] > 0
+    assert response.json()["data"]["queued"] == 0
+
+async def test_executor_cancel_queued():
+    executor = BoundedExecutor(max_workers=1, name="test")
+    release = threading.Event()
+    busy = asyncio.create_task(executor.run(release.wait))
+    queued = asyncio.create_task(executor.run(lambda: None))
+    await asyncio.sleep(0.05)
+    assert executor.stats()["queued"] == 1
+
+    # Отмененный вызов из очереди не выполняется и не остается в счетчике очереди
+    queued.cancel()
+    await asyncio.sleep(0.05)
+    release.set()
+    await busy
+    assert executor.stats()["queued"] == 0
+    assert executor.stats()["completed"] == 1
+
+async def test_json_log_exception():
+    log_queue = queue.SimpleQueue()
+    handler = LogQueueHandler(log_queue)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("test", logging.ERROR, __file__, 1, "error %s", (1,), None)
+        record.exc_info = sys.exc_info()
+    handler.handle(record)
+
+    # Трассировка выводится в отдельном поле, а не в тексте сообщения
+    data = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert data["message"] == "error 1"
+    assert "ValueError: boom" in data["exc_info"]
+
+async def test_request_id(admin_ac: AsyncClient):
+    response = await admin_ac.get("/system/pool", headers={"X-Request-ID": "test-request-id"})
+    assert response.headers["X-Request-ID"] == "test-request-id"
+
+    response = await admin_ac.get("/system/pool")
+    assert response.headers["X-Request-ID"]
+
+async def test_metrics(admin_ac: AsyncClient):
+    response = await admin_ac.get("/books/2")
+    assert response.status_code == 200
+    assert "db;dur=" in response.headers["Server-Timing"]
+
+    response = await admin_ac.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/books/{id}",status="200"}' in (
+        response.text
+    )
+    assert 'http_request_db_queries_bucket{method="GET",route="/books/{id}",le="+Inf"}' in (
+        response.text
+    )
+
+async def test_read_replica_fallback(admin_ac: AsyncClient, monkeypatch):
+    # Первая реплика недоступна, вторая - та же тестовая база
+    unavailable_url = settings.DB_URL.replace(f":{settings.DB_PORT}/", ":1/")
+    router = ReplicaRouter(urls=[unavailable_url, settings.DB_URL], retry_after=30)
+    monkeypatch.setattr("src.utils.db_manager.replica_router", router)
+    failed = pool_stats.failed
+    try:
+        for _ in range(3):
+            response = await admin_ac.get("/authors")
+            assert response.status_code == 200
+    finally:
+        await router.dispose()
+
+    unavailable, available = router.status()
+    assert not unavailable["available"]
+    assert unavailable["failures"] == 1
+    assert available["available"]
+    assert available["sessions"] == 3
+    # Ошибки подключения к реплике не попадают в статистику пула основной базы
+    assert pool_stats.failed == failed
+
+async def test_read_replica_lazy(monkeypatch):
+    router = ReplicaRouter(urls=[settings.DB_URL], retry_after=30)
+    monkeypatch.setattr("src.utils.db_manager.replica_router", router)
+    try:
+        # Если запросов к базе не было, к реплике не подключаемся
+        async with DBManager(session_factory=async_session_maker, read_only=True):
+            pass
+        assert router.status()[0]["sessions"] == 0
+
+        async with DBManager(session_factory=async_session_maker, read_only=True) as db:
+            await db.author.count()
+            await db.book.count()
+        assert router.status()[0]["sessions"] == 1
+    finally:
+        await router.dispose()
@@ -1,9 +1,18 @@
 from httpx import AsyncClient
 
+from src.schemas.user import UserResponse
+
 
 async def test_get_all_users(admin_ac: AsyncClient):
     response = await admin_ac.get("/user/")
     assert response.status_code == 200
+    # Из базы читаются только поля схемы ответа
+    assert set(response.json()["data"][0]) == set(UserResponse.model_fields)
+
+async def test_get_all_users_summary(admin_ac: AsyncClient):
+    response = await admin_ac.get("/user/", params={"view": "summary"})
+    assert response.status_code == 200
+    assert set(response.json()["data"][0]) == {"id", "name", "email", "is_admin"}
 
 async def test_turn_user_to_admin(admin_ac: AsyncClient):
     response = await admin_ac.put(
@@ -24,4 +33,10 @@ async def test_edit_reader(admin_ac: AsyncClient):
     assert response.status_code == 200
     assert response.json()["data"]["name"] == "new_name"
     assert response.json()["data"]["email"] == "new_email@example.com"
-    
\ No newline at end of file
+    
+async def test_get_me_after_edit(admin_ac: AsyncClient):
+    # Текущий пользователь закэширован, но кэш должен сбрасываться при изменении данных
+    response = await admin_ac.get(url="/auth/me")
+    assert response.status_code == 200
+    assert response.json()["data"]["name"] == "new_name"
+    assert response.json()["data"]["email"] == "new_email@example.com"
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from typing import Any, Awaitable, Callable, Iterator, Sequence
+
+from pydantic import ValidationError
+
+from src.exceptions import InvalidInputException
+from src.schemas.imports import ImportReport
+from src.utils.db_manager import DBManager
+
+
+# Разделитель значений в полях-списках CSV (например, author_ids: "1;2")
+CSV_LIST_SEPARATOR = ";"
+
+
+# Функция для разбора тела запроса массового импорта в список строк.
+# Поддерживаются JSON-массив, NDJSON (по объекту на строку) и CSV с заголовком.
+# Некорректная строка NDJSON возвращается как есть и отклоняется при валидации,
+# чтобы ошибка попала в отчет, а не прерывала весь импорт
+def parse_rows(body: bytes, content_type: str, list_fields: Sequence[str] = ()) -> list[Any]:
+    media_type = content_type.split(";")[0].strip().lower()
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise InvalidInputException
+
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        rows = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                rows.append(line)
+        return rows
+
+    if media_type == "text/csv":
+        rows = []
+        for row in csv.DictReader(io.StringIO(text)):
+            for field in list_fields:
+                if field in row:
+                    values = (row[field] or "").split(CSV_LIST_SEPARATOR)
+                    row[field] = [value.strip() for value in values if value.strip()]
+            rows.append(row)
+        return rows
+
+    if media_type in ("application/json", ""):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError:
+            raise InvalidInputException
+        if not isinstance(rows, list):
+            raise InvalidInputException
+        return rows
+
+    raise InvalidInputException
+
+
+# Функция для разбиения списка на части заданного размера
+def chunked(items: list, size: int) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+# Функция для записи строк импорта частями по chunk_size, каждая часть - в своей транзакции.
+# rows - пары (номер строки, данные), insert записывает часть и возвращает id добавленных
+# записей. Если часть не записалась, она делится пополам и записывается заново,
+# поэтому в отчет попадают только строки, которые не удалось записать по одной
+async def insert_chunks(
+    db: DBManager,
+    rows: list[tuple[int, Any]],
+    chunk_size: int,
+    insert: Callable[[list[tuple[int, Any]]], Awaitable[list[int]]],
+    report: ImportReport,
+) -> None:
+    pending = list(chunked(rows, chunk_size))
+    while pending:
+        chunk = pending.pop(0)
+        try:
+            created_ids = await insert(chunk)
+            await db.commit()
+        except InvalidInputException:
+            await db.rollback()
+            if len(chunk) == 1:
+                report.add_error(chunk[0][0], "Ошибка записи в базу данных")
+            else:
+                middle = len(chunk) // 2
+                pending[:0] = [chunk[:middle], chunk[middle:]]
+            continue
+        report.created_ids.extend(created_ids)
+
+
+# Функция для краткого описания ошибки валидации строки для отчета об импорте
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+# Описание тела запроса для эндпоинтов импорта в документации OpenAPI
+IMPORT_OPENAPI_EXTRA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+            "application/x-ndjson": {"schema": {"type": "string"}},
+            "text/csv": {"schema": {"type": "string"}},
+        },
+    }
+}
@@ -0,0 +1,154 @@
+import pickle
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from src.config import settings
+
+
+class BaseCache(ABC):
+    """
+    Интерфейс кэша. Методы асинхронные, чтобы реализацию в памяти процесса
+    можно было заменить на внешнее хранилище без изменения вызывающего кода.
+    Реализации считают попадания и промахи
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / requests, 4) if requests else 0.0,
+        }
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> Any | None: ...
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: Hashable) -> None: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+
+class TTLCache(BaseCache):
+    """
+    Кэш в памяти процесса с ограничением количества записей (вытесняются давно
+    не использованные) и временем жизни записей в секундах. Время жизни можно
+    переопределить для отдельной записи. При ttl <= 0 кэш отключен и всегда возвращает промах
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "size": len(self._data), "maxsize": self.maxsize}
+
+    async def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if self.ttl <= 0 or ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+
+class RedisCache(BaseCache):
+    """
+    Кэш во внешнем хранилище с протоколом Redis, общий для всех воркеров.
+    Ключи хранятся с префиксом, значения сериализуются pickle, время жизни задается
+    средствами хранилища. Требует установленного пакета redis
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: float):
+        super().__init__()
+        # Необязательная зависимость, нужна только при CACHE_BACKEND=redis
+        from redis.asyncio import Redis
+
+        self._client = Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: Hashable) -> Any | None:
+        raw = await self._client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(raw)
+
+    async def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if self.ttl <= 0 or ttl <= 0:
+            return
+        await self._client.set(self._key(key), pickle.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, key: Hashable) -> None:
+        await self._client.delete(self._key(key))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self._client.scan_iter(match=f"{self.prefix}:*")]
+        if keys:
+            await self._client.delete(*keys)
+
+
+# Функция для создания кэша с хранилищем, выбранным в настройках (CACHE_BACKEND)
+def create_cache(prefix: str, maxsize: int, ttl: float) -> BaseCache:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(url=settings.CACHE_REDIS_URL, prefix=prefix, ttl=ttl)
+    return TTLCache(maxsize=maxsize, ttl=ttl)
+
+
+# Кэш пользователей для аутентификации, ключ - id пользователя.
+# Сбрасывается при изменении данных пользователя, в остальных случаях запись живет USER_CACHE_TTL
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL)
+
+# Кэш проверенных JWT, ключ - сам токен. Запись живет до истечения срока действия токена,
+# поэтому подпись каждого токена проверяется один раз, а не при каждом запросе
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+# Кэш каталога книг: списки, количество и отдельные книги с авторами.
+# Полностью сбрасывается при любом изменении книг, авторов и количества экземпляров
+book_cache = create_cache(
+    prefix="books", maxsize=settings.BOOK_CACHE_MAXSIZE, ttl=settings.BOOK_CACHE_TTL
+)
@@ -1,36 +1,72 @@
+from functools import cached_property
+
 from src.CRUD.borrow import BorrowCRUD
 from src.CRUD.author import AuthorCRUD
 from src.CRUD.book import BookCRUD, BooksAuthorsCRUD
 from src.CRUD.user import UserCRUD
+from src.database import replica_router
 
 
 class DBManager:
     """
     Асинхронный контекстный менеджер для управления сессиями базы данных.
-    Создает новую сессию с БД и инициализирует репозитории для работы с ними
+    Сессия и репозитории создаются при первом обращении, поэтому запросы,
+    которым не нужна база (например, ответы из кэша), не создают ни сессии, ни репозиториев.
+    При read_only=True и настроенных репликах создается сессия ReplicaSession,
+    которая выбирает реплику при первом запросе к базе
     """
 
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, read_only: bool = False):
         self.session_factory = session_factory
+        self.read_only = read_only
+        self._session = None
 
-    # Создается новая сессия и инициализируются классы для работы с данными,
-    # которые будут работать с помощью этой сессии
     async def __aenter__(self):
-        self.session = self.session_factory()
-
-        self.author = AuthorCRUD(self.session)
-        self.book = BookCRUD(self.session)
-        self.user = UserCRUD(self.session)
-        self.books_authors = BooksAuthorsCRUD(self.session)
-        self.borrow = BorrowCRUD(self.session)
-
         return self
 
-    # Происходит откат изменений и закрытие сессии, для избежания
-    # утечек ресурсов и гарантирии, что сессия будет корректно завершена
+    # Если сессия создавалась, незавершенная транзакция откатывается и сессия закрывается,
+    # для избежания утечек ресурсов. Если транзакция уже завершена (например, после commit)
+    # или не начиналась, откат не выполняется
     async def __aexit__(self, *args):
-        await self.session.rollback()
-        await self.session.close()
+        if self._session is None:
+            return
+        if self._session.in_transaction():
+            await self._session.rollback()
+        await self._session.close()
+
+    @property
+    def session(self):
+        if self._session is None:
+            if self.read_only and replica_router.engines:
+                self._session = replica_router.session_maker()
+            else:
+                self._session = self.session_factory()
+        return self._session
+
+    @cached_property
+    def author(self) -> AuthorCRUD:
+        return AuthorCRUD(self.session)
+
+    @cached_property
+    def book(self) -> BookCRUD:
+        return BookCRUD(self.session)
+
+    @cached_property
+    def user(self) -> UserCRUD:
+        return UserCRUD(self.session)
+
+    @cached_property
+    def books_authors(self) -> BooksAuthorsCRUD:
+        return BooksAuthorsCRUD(self.session)
+
+    @cached_property
+    def borrow(self) -> BorrowCRUD:
+        return BorrowCRUD(self.session)
 
     async def commit(self):
-        await self.session.commit()
+        if self._session is not None:
+            await self._session.commit()
+
+    async def rollback(self):
+        if self._session is not None:
+            await self._session.rollback()
@@ -0,0 +1,45 @@
+import hashlib
+
+from fastapi import Response
+
+from src.utils.responses import FastJSONResponse
+
+
+# Функция для вычисления ETag по телу ответа
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+# Функция для проверки заголовка If-None-Match. Сравнение слабое (RFC 9110):
+# префикс W/ не учитывается, "*" совпадает с любым ETag
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
+
+
+# Функция для ответа 304 без тела
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+# Функция для формирования JSON-ответа с заранее вычисленным ETag
+# (например, по хешу строки в базе)
+def json_response_with_etag(content: dict, etag: str) -> Response:
+    return FastJSONResponse(content=content, headers={"ETag": etag})
+
+
+# Функция для формирования JSON-ответа с ETag. Тело сериализуется один раз:
+# по нему вычисляется ETag, и оно же отправляется клиенту.
+# Если ETag совпал с If-None-Match, возвращается 304 без тела
+def etag_json_response(content: dict, if_none_match: str | None) -> Response:
+    response = FastJSONResponse(content=content)
+    etag = make_etag(response.body)
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+    return response
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from src.config import settings
+
+
+class BoundedExecutor:
+    """
+    Выполняет блокирующие функции в ограниченном пуле потоков, не блокируя цикл событий.
+    Задачи сверх max_workers ждут в очереди. Собирает статистику по очереди и времени ожидания
+    """
+
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        # Счетчики меняются и из цикла событий, и из потоков пула
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def call() -> Any:
+            wait = time.perf_counter() - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        future = self._executor.submit(call)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    # Если ожидающая задача отменена, пока вызов стоял в очереди, вызов отменяется
+    # и не выполняется, поэтому он убирается из очереди здесь
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "avg_wait_seconds": round(self.total_wait / started, 6) if started else 0.0,
+                "max_wait_seconds": round(self.max_wait, 6),
+            }
+
+
+# Пул для хеширования и проверки паролей: bcrypt специально медленный (сотни миллисекунд)
+# и отпускает GIL, поэтому выполняется в отдельных потоках
+password_executor = BoundedExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, name="password-hasher"
+)
@@ -0,0 +1,88 @@
+import csv
+import io
+from typing import AsyncIterator, Callable, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from src.database import async_session_maker
+from src.schemas.book import BookWithRels
+from src.utils.bulk import CSV_LIST_SEPARATOR
+from src.utils.db_manager import DBManager
+
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Размер в символах, после набора которого накопленные строки отправляются клиенту
+FLUSH_SIZE = 64 * 1024
+
+
+async def _encode_ndjson(models: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    async for model in models:
+        yield model.model_dump_json() + "\n"
+
+
+async def _encode_csv(
+    models: AsyncIterator[BaseModel], to_row: Callable[[BaseModel], dict]
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = None
+    async for model in models:
+        row = to_row(model)
+        # Заголовок берется из полей первой строки
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _model_to_row(model: BaseModel) -> dict:
+    return model.model_dump(mode="json")
+
+
+# Функция для преобразования книги в строку CSV. Авторы записываются в author_ids
+# через ";", как при массовом импорте, чтобы выгрузку можно было загрузить обратно
+def book_to_csv_row(book: BookWithRels) -> dict:
+    row = book.model_dump(mode="json", exclude={"authors"})
+    row["author_ids"] = CSV_LIST_SEPARATOR.join(str(author.id) for author in book.authors)
+    return row
+
+
+# Функция для создания потокового ответа с выгрузкой данных в NDJSON или CSV.
+# export получает DBManager и возвращает асинхронный итератор моделей
+def stream_export(
+    export: Callable[[DBManager], AsyncIterator[BaseModel]],
+    export_format: ExportFormat,
+    filename: str,
+    to_row: Callable[[BaseModel], dict] = _model_to_row,
+) -> StreamingResponse:
+    async def generate() -> AsyncIterator[str]:
+        # Сессия создается внутри генератора, потому что сессия из зависимости DBDep
+        # закрывается раньше, чем начинается отправка ответа. Выгрузка читается с реплики
+        async with DBManager(session_factory=async_session_maker, read_only=True) as db:
+            models = export(db)
+            if export_format == "csv":
+                lines = _encode_csv(models, to_row)
+            else:
+                lines = _encode_ndjson(models)
+
+            chunk, size = [], 0
+            async for line in lines:
+                chunk.append(line)
+                size += len(line)
+                if size >= FLUSH_SIZE:
+                    yield "".join(chunk)
+                    chunk, size = [], 0
+            if chunk:
+                yield "".join(chunk)
+
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
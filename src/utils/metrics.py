@@ -0,0 +1,123 @@
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+# Границы корзин гистограмм: время ответа в секундах и количество запросов к базе
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus: накопительные счетчики по корзинам, сумма
+    и количество наблюдений для каждого набора значений меток
+    """
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...], buckets: tuple):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # значения меток -> [счетчики корзин (последняя - +Inf), сумма]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in self._series.items():
+            labels = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+
+
+# Статистика запросов к базе в рамках текущего HTTP-запроса.
+# Устанавливается MetricsMiddleware, заполняется обработчиками событий движка
+query_stats_var: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+class RequestMetrics:
+    """Метрики HTTP-запросов по маршрутам: время ответа, количество и время запросов к базе"""
+
+    def __init__(self):
+        self.latency = Histogram(
+            "http_request_duration_seconds",
+            "Время обработки HTTP-запроса",
+            ("method", "route", "status"),
+            LATENCY_BUCKETS,
+        )
+        self.db_queries = Histogram(
+            "http_request_db_queries",
+            "Количество запросов к базе данных за один HTTP-запрос",
+            ("method", "route"),
+            QUERY_COUNT_BUCKETS,
+        )
+        self.db_time = Histogram(
+            "http_request_db_duration_seconds",
+            "Время выполнения запросов к базе данных за один HTTP-запрос",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+
+    def observe(
+        self, method: str, route: str, status: int, duration: float, queries: QueryStats
+    ) -> None:
+        self.latency.observe(duration, method, route, str(status))
+        self.db_queries.observe(queries.count, method, route)
+        self.db_time.observe(queries.duration, method, route)
+
+    def render(self, extra_lines: list[str] | None = None) -> str:
+        lines = [
+            *self.latency.render(),
+            *self.db_queries.render(),
+            *self.db_time.render(),
+            *(extra_lines or []),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+# Функция для подключения подсчета запросов к базе: время каждого запроса
+# добавляется к статистике текущего HTTP-запроса, если она есть
+def instrument_engine(engine: AsyncEngine) -> None:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = query_stats_var.get()
+        if stats is None or context is None:
+            return
+        stats.count += 1
+        stats.duration += time.perf_counter() - context._query_started_at
@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ, который сериализуется pydantic_core напрямую, включая вложенные
+    pydantic модели. Если эндпоинт возвращает такой ответ сам, FastAPI не выполняет
+    jsonable_encoder, и данные не обходятся в Python дважды. Результат совпадает
+    с JSONResponse: компактный JSON в UTF-8
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)